@@ -0,0 +1,229 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+from contextlib import contextmanager
+from gspread.exceptions import APIError
+import metrics
+
+# Per-minute request budgets (Sheets API default is 60 per user per minute)
+SHEETS_READS_PER_MINUTE = int(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+
+# Requests allowed back-to-back before the per-minute rate applies
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+
+# Retry policy for 429 and 5xx responses
+MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 32.0
+
+# Lower numbers are served first
+PRIORITY_USER_WRITE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2
+
+# Writes are only retried when Google guarantees nothing was applied
+_RETRY_READ_STATUSES = {429, 500, 502, 503, 504}
+_RETRY_WRITE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Take a token; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RequestScheduler:
+    """Routes every Google API request through read/write token buckets by priority"""
+
+    def __init__(
+        self,
+        reads_per_minute=SHEETS_READS_PER_MINUTE,
+        writes_per_minute=SHEETS_WRITES_PER_MINUTE,
+        burst=SHEETS_BURST,
+        max_retries=MAX_RETRIES,
+    ):
+        self.max_retries = max_retries
+        self._buckets = {
+            "read": TokenBucket(reads_per_minute / 60.0, burst),
+            "write": TokenBucket(writes_per_minute / 60.0, burst),
+        }
+        self._waiting = {"read": [], "write": []}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._local = threading.local()
+        self.stats = {
+            "requests_read": 0,
+            "requests_write": 0,
+            "retries": 0,
+            "throttled_requests": 0,
+            "throttle_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    @property
+    def queue_depth(self):
+        """Number of requests waiting for a token"""
+        with self._cond:
+            return len(self._waiting["read"]) + len(self._waiting["write"])
+
+    def snapshot(self):
+        """Return counters plus current queue depth"""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["queue_depth"] = len(self._waiting["read"]) + len(
+                self._waiting["write"]
+            )
+        return stats
+
+    @contextmanager
+    def priority(self, level):
+        """Run the enclosed Google API calls at the given priority"""
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = level
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def install(self, client):
+        """Route all HTTP requests of a gspread client through the scheduler"""
+        # gspread 6 moved request() to client.http_client
+        http = getattr(client, "http_client", client)
+        if getattr(http, "_scheduled_by", None) is self:
+            return client
+
+        original_request = http.request
+
+        def request(method, endpoint, *args, **kwargs):
+            label = _endpoint_label(endpoint)
+            kind = "read" if method.lower() == "get" else "write"
+            metrics.inc("google_api_requests_total", kind=kind, endpoint=label)
+            with metrics.timer("google_api_request_seconds", endpoint=label):
+                return self.call(
+                    method,
+                    lambda: original_request(method, endpoint, *args, **kwargs),
+                )
+
+        http.request = request
+        http._scheduled_by = self
+        return client
+
+    def call(self, method, send):
+        """Send a request once a token is available, retrying 429/5xx with backoff"""
+        kind = "read" if method.lower() == "get" else "write"
+        priority = getattr(self._local, "priority", None)
+        if priority is None:
+            priority = PRIORITY_USER_WRITE if kind == "write" else PRIORITY_DEFAULT
+        retry_statuses = _RETRY_READ_STATUSES if kind == "read" else _RETRY_WRITE_STATUSES
+
+        attempt = 0
+        while True:
+            self._acquire(kind, priority)
+            try:
+                return send()
+            except APIError as e:
+                status = _status_code(e)
+                metrics.inc("google_api_errors_total", status=status)
+                if status not in retry_statuses or attempt >= self.max_retries:
+                    raise
+
+                # Jittered exponential backoff
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+                attempt += 1
+                with self._cond:
+                    self.stats["retries"] += 1
+                    self.stats["backoff_seconds"] += delay
+                print(f"⏳ Google API returned {status}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _acquire(self, kind, priority):
+        bucket = self._buckets[kind]
+        waiting = self._waiting[kind]
+        entry = (priority, next(self._seq))
+        started = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(waiting, entry)
+            try:
+                while True:
+                    # Only the highest-priority waiter may take a token
+                    if waiting[0] == entry:
+                        wait = bucket.take()
+                        if wait == 0:
+                            heapq.heappop(waiting)
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            except BaseException:
+                waiting.remove(entry)
+                heapq.heapify(waiting)
+                raise
+            finally:
+                self._cond.notify_all()
+
+            self.stats[f"requests_{kind}"] += 1
+            throttled = time.monotonic() - started
+            if throttled > 0.001:
+                self.stats["throttled_requests"] += 1
+                self.stats["throttle_seconds"] += throttled
+
+
+def _endpoint_label(url):
+    """Short endpoint name for metrics, e.g. values:append or batchUpdate"""
+    if "/drive/" in url:
+        return "drive.permissions" if url.endswith("/permissions") else "drive.files"
+    if "values:batchGet" in url:
+        return "values:batchGet"
+    if url.endswith(":append"):
+        return "values:append"
+    if "/values" in url:
+        return "values"
+    if url.endswith(":batchUpdate"):
+        return "batchUpdate"
+    return "metadata"
+
+
+def _status_code(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def set_scheduler(scheduler):
+    """Replace the process-wide request scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+
+def get_scheduler():
+    """Return the process-wide request scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
@@ -0,0 +1,70 @@
+"""Benchmark for the task categorizer as the keyword table grows
+
+Run from the repository root:
+
+    python -m benchmarks.categorizer_bench
+"""
+
+import random
+import string
+import time
+from categorizer import Categorizer, DEFAULT_CATEGORIES
+
+TASKS = [
+    "Schedule a call with the Singapore distributor about Q3 volumes",
+    "Review the updated vendor contract before signing",
+    "Prepare the quarterly board report and share the draft",
+    "Get approval for the new marketing budget",
+    "Recall the defective batch and notify affected customers",
+    "Book flights for the regional offsite next month",
+    "Follow up with recruiting on the open engineering roles",
+    "Check the warehouse inventory numbers against last week",
+]
+
+
+def _table(keyword_count, seed=7):
+    """Default categories padded with synthetic department keywords"""
+    rng = random.Random(seed)
+    categories = {name: list(words) for name, words in DEFAULT_CATEGORIES.items()}
+    departments = [f"Department {i}" for i in range(max(1, keyword_count // 10))]
+    for i in range(keyword_count):
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10)))
+        categories.setdefault(departments[i % len(departments)], []).append(word)
+    return categories
+
+
+def _naive(categories):
+    """The previous approach: one substring scan per keyword"""
+    def categorize(task):
+        task_lower = task.lower()
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                if keyword in task_lower:
+                    return category
+        return "General"
+
+    return categorize
+
+
+def _time_ns(func, iterations):
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        for task in TASKS:
+            func(task)
+    return (time.perf_counter_ns() - start) / (iterations * len(TASKS))
+
+
+def run(sizes=(10, 100, 300, 1000), iterations=2000):
+    results = []
+    for size in sizes:
+        categories = _table(size)
+        categorizer = Categorizer(categories)
+        single_pass = _time_ns(categorizer.categorize, iterations)
+        naive = _time_ns(_naive(categories), iterations)
+        results.append({"keywords": size, "single_pass_ns": single_pass, "naive_ns": naive})
+        print(f"{size:>5} keywords: single-pass {single_pass:8.0f} ns, naive {naive:8.0f} ns")
+    return results
+
+
+if __name__ == "__main__":
+    run()
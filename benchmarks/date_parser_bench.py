@@ -0,0 +1,62 @@
+"""Micro-benchmark for the due date parser
+
+Run from the repository root:
+
+    python -m benchmarks.date_parser_bench
+"""
+
+import time
+import datetime
+from date_parser import extract_due_date
+
+# Wednesday, so weekday phrases exercise both directions
+REFERENCE = datetime.date(2024, 1, 10)
+
+# Real task strings with the due date expected relative to REFERENCE
+CORPUS = [
+    ("Send board deck to investors by tomorrow", "2024-01-11"),
+    ("Approve Q1 marketing budget today", None),
+    ("Finance report due today", "2024-01-10"),
+    ("Call with legal team by next week", "2024-01-17"),
+    ("Review vendor contract by friday", "2024-01-12"),
+    ("Prepare hiring plan due on monday", "2024-01-15"),
+    ("Sync with CTO next wednesday", "2024-01-17"),
+    ("Draft press release this friday", "2024-01-12"),
+    ("Finish budget review by Wednesday", "2024-01-17"),
+    ("Submit tax documents on 5th jan", "2025-01-05"),
+    ("Submit audit checklist by mar 3", "2024-03-03"),
+    ("Renew office lease by March 31st", "2024-03-31"),
+    ("Quarterly offsite on 12 feb", "2024-02-12"),
+    ("Board meeting on 2024-02-20", "2024-02-20"),
+    ("Close hiring for sales lead end of month", "2024-01-31"),
+    ("Weekly numbers to leadership end of week", "2024-01-12"),
+    ("Check in with the design agency", None),
+    ("Recall the defective batch and notify customers", None),
+    ("Plan anniversary dinner on 30 feb", None),
+    ("Update investor CRM by next monday", "2024-01-22"),
+]
+
+
+def run(iterations=20000):
+    correct = 0
+    for text, expected in CORPUS:
+        actual = extract_due_date(text, reference=REFERENCE)
+        if actual == expected:
+            correct += 1
+        else:
+            print(f"✗ {text!r}: expected {expected}, got {actual}")
+
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        for text, _ in CORPUS:
+            extract_due_date(text, reference=REFERENCE)
+    elapsed = time.perf_counter_ns() - start
+
+    parses = iterations * len(CORPUS)
+    print(f"accuracy: {correct}/{len(CORPUS)}")
+    print(f"per parse: {elapsed / parses:.0f} ns over {parses} parses")
+    return {"accuracy": correct / len(CORPUS), "ns_per_parse": elapsed / parses}
+
+
+if __name__ == "__main__":
+    run()
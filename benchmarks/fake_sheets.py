@@ -0,0 +1,501 @@
+"""In-process stand-in for the Google Sheets and Drive endpoints gspread uses
+
+FakeSheetsBackend keeps spreadsheets in memory. FakeSession plugs into a
+gspread client in place of the authorized HTTP session, so the real gspread
+and sheets_manager code paths run without touching the network:
+
+    backend = FakeSheetsBackend(latency=0.05)
+    client = backend.client()
+"""
+
+import re
+import json
+import time
+import random
+import threading
+import itertools
+from collections import Counter
+from urllib.parse import unquote
+
+SHEETS_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+
+_CELL_RE = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+class FakeResponse:
+    """The subset of requests.Response that gspread reads"""
+
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.ok = 200 <= status_code < 400
+        self._payload = payload
+        self.text = json.dumps(payload)
+        self.content = self.text.encode("utf-8")
+        self.headers = {"Content-Type": "application/json"}
+
+    def json(self):
+        return self._payload
+
+
+class FakeSheetsBackend:
+    """Thread-safe in-memory spreadsheets with latency, quota and 429 injection"""
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        reads_per_minute=None,
+        writes_per_minute=None,
+        error_rate=0.0,
+        seed=0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.reads_per_minute = reads_per_minute
+        self.writes_per_minute = writes_per_minute
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._spreadsheets = {}
+        self._window = {"read": [], "write": []}
+        self.calls = Counter()
+
+    # Test setup helpers
+
+    def client(self):
+        """Return a gspread client whose HTTP session is served by this backend"""
+        import gspread
+
+        return gspread.Client(None, session=FakeSession(self))
+
+    def create_spreadsheet(self, title):
+        with self._lock:
+            spreadsheet_id = f"fake-{next(self._ids)}"
+            self._spreadsheets[spreadsheet_id] = {
+                "title": title,
+                "sheets": [],
+                "version": 1,
+                "edited_by_hand": False,
+                # Like Sheets, tab ids are only unique within a spreadsheet; the first is 0
+                "sheet_ids": itertools.count(0),
+            }
+            self._add_sheet(spreadsheet_id, {"title": "Sheet1"})
+            return spreadsheet_id
+
+    def add_rows(self, spreadsheet_id, title, rows):
+        """Seed a tab directly, without counting API calls"""
+        with self._lock:
+            sheet = self._sheet_by_title(spreadsheet_id, title)
+            if sheet is None:
+                sheet = self._add_sheet(spreadsheet_id, {"title": title})
+            sheet["rows"].extend([list(row) for row in rows])
+            _grow(sheet, len(sheet["rows"]))
+
+    def edit_cell(self, spreadsheet_id, title, row, column, value):
+        """Change a cell as a person would in the browser (1-based row and column)"""
+        with self._lock:
+            sheet = self._sheet_by_title(spreadsheet_id, title)
+            while len(sheet["rows"]) < row:
+                sheet["rows"].append([])
+            cells = sheet["rows"][row - 1]
+            cells.extend([""] * (column - len(cells)))
+            cells[column - 1] = value
+            spreadsheet = self._spreadsheets[spreadsheet_id]
+            spreadsheet["version"] += 1
+            spreadsheet["edited_by_hand"] = True
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    # Request dispatch
+
+    def handle(self, method, url, params=None, json=None):
+        method = method.upper()
+        kind = "read" if method == "GET" else "write"
+
+        with self._lock:
+            self.calls[(kind, _endpoint_name(url))] += 1
+            throttled = self._throttled(kind)
+            injected = self.error_rate and self._random.random() < self.error_rate
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if throttled or injected:
+            return _error(429, "RESOURCE_EXHAUSTED", "Quota exceeded")
+
+        try:
+            with self._lock:
+                return FakeResponse(200, self._route(method, url, params or {}, json))
+        except KeyError as e:
+            return _error(404, "NOT_FOUND", f"Not found: {e}")
+        except ValueError as e:
+            return _error(400, "INVALID_ARGUMENT", str(e))
+
+    def _throttled(self, kind):
+        limit = self.reads_per_minute if kind == "read" else self.writes_per_minute
+        if not limit:
+            return False
+        now = time.monotonic()
+        window = [t for t in self._window[kind] if now - t < 60]
+        self._window[kind] = window
+        if len(window) >= limit:
+            return True
+        window.append(now)
+        return False
+
+    def _route(self, method, url, params, body):
+        if url.startswith(DRIVE_FILES_URL):
+            return self._drive(method, url[len(DRIVE_FILES_URL) :], params, body)
+        if not url.startswith(SHEETS_URL + "/"):
+            raise KeyError(url)
+
+        path = url[len(SHEETS_URL) + 1 :]
+        spreadsheet_id, _, rest = path.partition("/")
+
+        if ":batchUpdate" in spreadsheet_id and method == "POST":
+            return self._batch_update(spreadsheet_id.split(":")[0], body)
+        if not rest and method == "GET":
+            return self._metadata(spreadsheet_id)
+        if rest == "values:batchGet":
+            ranges = params.get("ranges", [])
+            if isinstance(ranges, str):
+                ranges = [ranges]
+            return {
+                "spreadsheetId": spreadsheet_id,
+                "valueRanges": [
+                    self._values_get(spreadsheet_id, r, params) for r in ranges
+                ],
+            }
+        if rest.startswith("values/"):
+            range_part = rest[len("values/") :]
+            if range_part.endswith(":append"):
+                return self._values_append(
+                    spreadsheet_id, unquote(range_part[: -len(":append")]), body
+                )
+            if range_part.endswith(":clear"):
+                return {}
+            if method == "GET":
+                return self._values_get(spreadsheet_id, unquote(range_part), params)
+            if method == "PUT":
+                return self._values_update(spreadsheet_id, unquote(range_part), body)
+        raise KeyError(url)
+
+    # Drive
+
+    def _drive(self, method, path, params, body):
+        if method == "GET" and path == "":
+            match = re.search(r"name = '((?:[^'\\]|\\.)*)'", params.get("q", ""))
+            name = match.group(1).replace("\\'", "'") if match else None
+            files = [
+                {"id": sid, "name": s["title"], "createdTime": "", "modifiedTime": ""}
+                for sid, s in self._spreadsheets.items()
+                if name is None or s["title"] == name
+            ]
+            return {"kind": "drive#fileList", "files": files}
+        if method == "POST" and path == "":
+            spreadsheet_id = self.create_spreadsheet(body["name"])
+            return {"id": spreadsheet_id, "name": body["name"]}
+        file_id, _, sub = path.lstrip("/").partition("/")
+        spreadsheet = self._spreadsheets[file_id]
+        if sub == "permissions":
+            return {"kind": "drive#permission", "id": "anyoneWithLink"}
+        if method == "GET" and not sub:
+            return {
+                "id": file_id,
+                "name": spreadsheet["title"],
+                "version": str(spreadsheet["version"]),
+                "lastModifyingUser": {"me": not spreadsheet["edited_by_hand"]},
+            }
+        raise KeyError(path)
+
+    # Sheets metadata and batchUpdate
+
+    def _metadata(self, spreadsheet_id):
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "properties": {"title": spreadsheet["title"], "locale": "en_US"},
+            "sheets": [{"properties": dict(s["properties"])} for s in spreadsheet["sheets"]],
+        }
+
+    def _batch_update(self, spreadsheet_id, body):
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        replies = []
+        for request in body.get("requests", []):
+            (name, payload), = request.items()
+            if name == "addSheet":
+                sheet = self._add_sheet(spreadsheet_id, payload.get("properties", {}))
+                replies.append({"addSheet": {"properties": dict(sheet["properties"])}})
+            elif name == "deleteSheet":
+                spreadsheet["sheets"] = [
+                    s
+                    for s in spreadsheet["sheets"]
+                    if s["properties"]["sheetId"] != payload["sheetId"]
+                ]
+                replies.append({})
+            elif name == "appendCells":
+                sheet = self._sheet_by_id(spreadsheet_id, payload["sheetId"])
+                rows = [
+                    [_cell_value(cell) for cell in row.get("values", [])]
+                    for row in payload.get("rows", [])
+                ]
+                self._append(sheet, rows)
+                replies.append({})
+            elif name == "deleteDimension":
+                range_ = payload["range"]
+                sheet = self._sheet_by_id(spreadsheet_id, range_["sheetId"])
+                if range_.get("dimension", "ROWS") == "ROWS":
+                    del sheet["rows"][range_["startIndex"] : range_["endIndex"]]
+                replies.append({})
+            else:
+                # Formatting, widths, borders, properties: accepted and ignored
+                replies.append({})
+        spreadsheet["version"] += 1
+        spreadsheet["edited_by_hand"] = False
+
+        response = {"spreadsheetId": spreadsheet_id, "replies": replies}
+        if body.get("includeSpreadsheetInResponse"):
+            response["updatedSpreadsheet"] = self._spreadsheet_with_data(
+                spreadsheet_id, body.get("responseRanges", [])
+            )
+        return response
+
+    def _spreadsheet_with_data(self, spreadsheet_id, ranges):
+        metadata = self._metadata(spreadsheet_id)
+        for range_name in ranges:
+            title, r0, c0, r1, c1 = self._parse_range(spreadsheet_id, range_name)
+            sheet = self._sheet_by_title(spreadsheet_id, title)
+            block = _slice(sheet["rows"], r0, c0, r1, c1)
+            for entry in metadata["sheets"]:
+                if entry["properties"]["title"] == title:
+                    entry.setdefault("data", []).append(
+                        {
+                            "startRow": r0,
+                            "rowData": [
+                                {"values": [{"formattedValue": v} for v in row]}
+                                for row in block
+                            ],
+                        }
+                    )
+        return metadata
+
+    # Values
+
+    def _values_get(self, spreadsheet_id, range_name, params):
+        title, r0, c0, r1, c1 = self._parse_range(spreadsheet_id, range_name)
+        sheet = self._sheet_by_title(spreadsheet_id, title)
+        block = _slice(sheet["rows"], r0, c0, r1, c1)
+        result = {"range": range_name, "majorDimension": "ROWS"}
+        if params.get("majorDimension") == "COLUMNS":
+            width = max((len(row) for row in block), default=0)
+            columns = [[row[c] if c < len(row) else "" for row in block] for c in range(width)]
+            block = [_trim(column) for column in columns]
+            result["majorDimension"] = "COLUMNS"
+        if block:
+            result["values"] = block
+        return result
+
+    def _values_append(self, spreadsheet_id, range_name, body):
+        title = self._parse_range(spreadsheet_id, range_name)[0]
+        sheet = self._sheet_by_title(spreadsheet_id, title)
+        rows = [list(row) for row in body.get("values", [])]
+        first_row = self._append(sheet, rows)
+        width = max((len(row) for row in rows), default=1)
+        updated = f"'{title}'!A{first_row}:{_column_letter(width)}{first_row + len(rows) - 1}"
+        self._bump(spreadsheet_id)
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "updates": {"updatedRange": updated, "updatedRows": len(rows)},
+        }
+
+    def _values_update(self, spreadsheet_id, range_name, body):
+        title, r0, c0, _, _ = self._parse_range(spreadsheet_id, range_name)
+        sheet = self._sheet_by_title(spreadsheet_id, title)
+        for i, values in enumerate(body.get("values", [])):
+            row_index = r0 + i
+            while len(sheet["rows"]) <= row_index:
+                sheet["rows"].append([])
+            row = sheet["rows"][row_index]
+            while len(row) < c0 + len(values):
+                row.append("")
+            row[c0 : c0 + len(values)] = values
+        self._bump(spreadsheet_id)
+        return {"spreadsheetId": spreadsheet_id, "updatedRange": range_name}
+
+    # Internals
+
+    def _bump(self, spreadsheet_id):
+        """Record an edit made through the API, i.e. by the bot"""
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        spreadsheet["version"] += 1
+        spreadsheet["edited_by_hand"] = False
+
+    def _add_sheet(self, spreadsheet_id, properties):
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        title = properties.get("title") or f"Sheet{len(spreadsheet['sheets']) + 1}"
+        if self._sheet_by_title(spreadsheet_id, title) is not None:
+            raise ValueError(f'A sheet with the name "{title}" already exists.')
+        grid = properties.get("gridProperties", {})
+        sheet = {
+            "properties": {
+                "sheetId": next(spreadsheet["sheet_ids"]),
+                "title": title,
+                "index": len(spreadsheet["sheets"]),
+                "sheetType": "GRID",
+                "gridProperties": {
+                    "rowCount": grid.get("rowCount", 1000),
+                    "columnCount": grid.get("columnCount", 26),
+                },
+            },
+            "rows": [],
+        }
+        spreadsheet["sheets"].append(sheet)
+        return sheet
+
+    def _append(self, sheet, rows):
+        """Append after the last row with data; return the 1-based first row"""
+        data_rows = _trim(sheet["rows"], empty=lambda row: not any(v != "" for v in row))
+        sheet["rows"] = data_rows
+        first_row = len(data_rows) + 1
+        data_rows.extend(rows)
+        _grow(sheet, len(data_rows))
+        return first_row
+
+    def _sheet_by_title(self, spreadsheet_id, title):
+        for sheet in self._spreadsheets[spreadsheet_id]["sheets"]:
+            if sheet["properties"]["title"] == title:
+                return sheet
+        return None
+
+    def _sheet_by_id(self, spreadsheet_id, sheet_id):
+        for sheet in self._spreadsheets[spreadsheet_id]["sheets"]:
+            if sheet["properties"]["sheetId"] == sheet_id:
+                return sheet
+        raise ValueError(f"No grid with id: {sheet_id}")
+
+    def _parse_range(self, spreadsheet_id, range_name):
+        """Parse 'Title'!A1:B2 into (title, row0, col0, row1, col1), ends exclusive"""
+        if "!" in range_name:
+            title, _, cells = range_name.rpartition("!")
+        elif self._sheet_by_title(spreadsheet_id, range_name.strip("'")) is not None:
+            title, cells = range_name, ""
+        else:
+            title, cells = self._spreadsheets[spreadsheet_id]["sheets"][0][
+                "properties"
+            ]["title"], range_name
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        if self._sheet_by_title(spreadsheet_id, title) is None:
+            raise ValueError(f"Unable to parse range: {range_name}")
+
+        if not cells:
+            return title, 0, 0, None, None
+        start, _, end = cells.partition(":")
+        r0, c0 = _cell(start)
+        r1, c1 = _cell(end) if end else _cell(start)
+        return (
+            title,
+            (r0 - 1) if r0 else 0,
+            (c0 - 1) if c0 else 0,
+            r1,
+            c1,
+        )
+
+
+class FakeSession:
+    """Stands in for the authorized requests session of a gspread client"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        return self.backend.handle(method, url, params=params, json=json)
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("put", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("delete", url, **kwargs)
+
+
+def _endpoint_name(url):
+    """Short label for call counting, e.g. 'values:append' or 'batchUpdate'"""
+    if url.startswith(DRIVE_FILES_URL):
+        return "drive.permissions" if url.endswith("/permissions") else "drive.files"
+    path = url[len(SHEETS_URL) :]
+    if ":batchUpdate" in path and "/values" not in path:
+        return "batchUpdate"
+    if "values:batchGet" in path:
+        return "values:batchGet"
+    if path.endswith(":append"):
+        return "values:append"
+    if "/values/" in path:
+        return "values"
+    return "metadata"
+
+
+def _error(code, status, message):
+    return FakeResponse(code, {"error": {"code": code, "status": status, "message": message}})
+
+
+def _cell(label):
+    match = _CELL_RE.match(label)
+    if not match:
+        raise ValueError(f"Unable to parse range: {label}")
+    letters, digits = match.groups()
+    col = 0
+    for char in letters.upper():
+        col = col * 26 + ord(char) - ord("A") + 1
+    return (int(digits) if digits else None), (col or None)
+
+
+def _column_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _slice(rows, r0, c0, r1, c1):
+    block = []
+    for row in rows[r0:r1]:
+        block.append([str(v) for v in row[c0:c1]])
+    # Like the real API, trailing empty cells and rows are omitted
+    block = [_trim(row) for row in block]
+    return _trim(block, empty=lambda row: not row)
+
+
+def _trim(values, empty=lambda v: v == ""):
+    values = list(values)
+    while values and empty(values[-1]):
+        values.pop()
+    return values
+
+
+def _grow(sheet, row_count):
+    grid = sheet["properties"]["gridProperties"]
+    grid["rowCount"] = max(grid["rowCount"], row_count)
+
+
+def _cell_value(cell):
+    value = cell.get("userEnteredValue", {})
+    if "numberValue" in value:
+        number = value["numberValue"]
+        return int(number) if float(number).is_integer() else number
+    return value.get("stringValue", "")
@@ -0,0 +1,203 @@
+"""Benchmark suite for the Google Sheets storage layer against a local fake
+
+Run from the repository root (needs gspread and a config.py, no network):
+
+    python -m benchmarks.storage_bench --latency 0.02 --output bench_results.json
+
+Reports API calls per task, p50/p99 latency of append_task_to_sheet,
+/summary cost against tab and row counts, and throughput with concurrent
+chats. Results are written as JSON so runs can be diffed between versions.
+"""
+
+import os
+import json
+import time
+import argparse
+import contextlib
+import tempfile
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import api_scheduler
+import sheets_manager
+from sheets_session import SheetsSession, set_session
+from shards import ShardDirectory, set_shards
+from task_store import TaskStore, set_task_store
+from benchmarks.fake_sheets import FakeSheetsBackend
+
+HEADER = [
+    "#",
+    "Category",
+    "Task / Description",
+    "Sub-Tasks / Notes",
+    "Owner",
+    "Due Date",
+    "Status",
+    "Created Date",
+]
+
+TASKS = [
+    "Call the auditors about the Q3 close by friday",
+    "Review the vendor contract before signing",
+    "Prepare the board report due on monday",
+    "Get approval for the hiring plan",
+    "Book the offsite venue by mar 3",
+]
+
+
+def _fresh_backend(**kwargs):
+    """Point sheets_manager at a new fake backend with empty caches"""
+    backend = FakeSheetsBackend(**kwargs)
+    state_dir = tempfile.mkdtemp()
+    session = SheetsSession(
+        sheet_name="Benchmark Tasks",
+        state_file=os.path.join(state_dir, "sheet_state.json"),
+        client_factory=backend.client,
+    )
+    set_session(session)
+    set_shards(ShardDirectory(primary=session, path=os.path.join(state_dir, "shards.json")))
+    # Keep fake tasks out of the real local task store
+    set_task_store(TaskStore(os.path.join(state_dir, "tasks.sqlite3")))
+    # Quotas are enforced by the fake itself; keep the client-side scheduler out of the way
+    api_scheduler.set_scheduler(
+        api_scheduler.RequestScheduler(
+            reads_per_minute=10**6, writes_per_minute=10**6, burst=10**6
+        )
+    )
+    sheets_manager._task_counters.clear()
+    sheets_manager._worksheet_locks.clear()
+    return backend
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_append(latency, tasks=100, chats=5):
+    """Latency and API calls per append_task_to_sheet in steady state"""
+    backend = _fresh_backend(latency=latency)
+
+    # Warm up: open the spreadsheet and create every chat tab once
+    for chat in range(chats):
+        sheets_manager.append_task_to_sheet(
+            TASKS[0], "Bench", "", f"Chat {chat}", chat
+        )
+    backend.reset_calls()
+
+    samples = []
+    for i in range(tasks):
+        chat = i % chats
+        start = time.perf_counter()
+        ok = sheets_manager.append_task_to_sheet(
+            TASKS[i % len(TASKS)], "Bench", "", f"Chat {chat}", chat
+        )
+        samples.append(time.perf_counter() - start)
+        assert ok, "append failed"
+
+    return {
+        "tasks": tasks,
+        "api_calls_per_task": backend.total_calls / tasks,
+        "calls_by_endpoint": {f"{k}:{e}": n for (k, e), n in backend.calls.items()},
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+    }
+
+
+def bench_summary(latency, tab_counts=(5, 20, 40), row_counts=(10, 1000)):
+    """API calls and time of /summary against tab count and rows per tab"""
+    results = []
+    for tabs in tab_counts:
+        for rows in row_counts:
+            backend = _fresh_backend(latency=latency)
+            spreadsheet_id = sheets_manager.get_or_create_spreadsheet().id
+            for tab in range(tabs):
+                backend.add_rows(
+                    spreadsheet_id,
+                    f"Chat {tab}",
+                    [HEADER] + [[n] + ["x"] * 7 for n in range(1, rows + 1)],
+                )
+            backend.reset_calls()
+
+            start = time.perf_counter()
+            summary = sheets_manager.get_worksheet_summary()
+            elapsed = time.perf_counter() - start
+            assert sum(summary.values()) == tabs * rows, summary
+
+            results.append(
+                {
+                    "tabs": tabs,
+                    "rows_per_tab": rows,
+                    "api_calls": backend.total_calls,
+                    "ms": elapsed * 1000,
+                }
+            )
+    return results
+
+
+def bench_concurrency(latency, chat_counts=(1, 4, 8), tasks_per_chat=20):
+    """Tasks per second when several chats write at the same time"""
+    results = []
+    for chats in chat_counts:
+        _fresh_backend(latency=latency)
+        sheets_manager.get_or_create_spreadsheet()
+
+        def run_chat(chat):
+            for i in range(tasks_per_chat):
+                sheets_manager.append_task_to_sheet(
+                    TASKS[i % len(TASKS)], "Bench", "", f"Chat {chat}", chat
+                )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=chats) as pool:
+            list(pool.map(run_chat, range(chats)))
+        elapsed = time.perf_counter() - start
+
+        total = chats * tasks_per_chat
+        results.append(
+            {"chats": chats, "tasks": total, "tasks_per_second": total / elapsed}
+        )
+    return results
+
+
+def run(latency=0.02):
+    # Keep the per-task log lines of sheets_manager out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "latency_s": latency,
+            "append": bench_append(latency),
+            "summary": bench_summary(latency),
+            "concurrency": bench_concurrency(latency),
+        }
+
+
+def report(results):
+    append = results["append"]
+    print(
+        f"append: {append['api_calls_per_task']:.2f} API calls/task, "
+        f"p50 {append['p50_ms']:.1f} ms, p99 {append['p99_ms']:.1f} ms"
+    )
+    for row in results["summary"]:
+        print(
+            f"summary: {row['tabs']:>3} tabs x {row['rows_per_tab']:>5} rows: "
+            f"{row['api_calls']} calls, {row['ms']:.1f} ms"
+        )
+    for row in results["concurrency"]:
+        print(f"concurrency: {row['chats']} chats: {row['tasks_per_second']:.1f} tasks/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Storage layer benchmarks")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds per fake API call"
+    )
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    results = run(args.latency)
+    report(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {args.output}")
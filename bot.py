@@ -1,3 +1,6 @@
+import os
+import asyncio
+import datetime
 from telegram import Update, BotCommand
 from telegram.ext import (
     ApplicationBuilder,
@@ -9,13 +12,50 @@ from telegram.ext import (
 from config import BOT_TOKEN, AUTHORIZED_USERS
 from task_extraction import extract_tasks_from_message, find_hidden_tasks
 from sheets_manager import (
-    append_task_to_sheet,
+    build_task_row,
     get_spreadsheet_url,
+    get_spreadsheet_urls,
     get_all_worksheets,
     get_worksheet_summary,
+    warm_up_sheets,
+    get_session_stats,
+    archive_tasks,
+    ARCHIVE_STATUSES,
 )
+from sheets_session import sanitize_title
+from task_store import get_task_store
+from sheet_sync import sync_task_store, sync_sheet_changes, SHEET_SYNC_SECONDS
+from reminders import ReminderScheduler
+from report import get_task_report
+from exporter import export_tasks, export_filename, EXPORT_FORMATS
+from write_queue import SheetWriteQueue
+from outbox import Outbox
+from dedupe import Deduplicator
+from status_replies import StatusReplies
+from update_processor import ChatOrderedUpdateProcessor
+from api_scheduler import get_scheduler
+import metrics
 
+# Users allowed to see /stats (defaults to all authorized users)
+ADMIN_USERS = [
+    int(user_id) for user_id in os.getenv("ADMIN_USERS", "").split(",") if user_id.strip()
+] or AUTHORIZED_USERS
 
+# Hours between archive rollovers of completed and old tasks (0 disables them)
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))
+
+# Let startup traffic settle before the first rollover
+ARCHIVE_FIRST_DELAY = 60
+
+# Minutes between full reconciles of the local task store with the sheets
+# (edits in between are picked up by the cheaper incremental sync)
+TASK_STORE_SYNC_MINUTES = float(os.getenv("TASK_STORE_SYNC_MINUTES", "360"))
+
+# Most tasks listed in one reply
+TASK_LIST_LIMIT = 30
+
+
+@metrics.instrument_handler
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Process incoming messages and extract tasks starting with #"""
     message = update.message
@@ -37,26 +77,50 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Get chat name (for the sheet tab)
-    if chat.type == "private":
-        chat_name = f"Private_{user.username or user.first_name}"
-    else:
-        chat_name = chat.title
+    chat_name = get_chat_name(chat, user)
 
     # Extract tasks that start with #
     tasks = extract_tasks_from_message(text)
 
     if tasks:
-        tasks_added = 0
-        for task in tasks:
-            if append_task_to_sheet(task, user.full_name, text, chat_name, chat.id):
-                tasks_added += 1
-
-        if tasks_added > 0:
-            await message.reply_text(f"✅ Added {tasks_added} task(s) to the list.")
-        else:
+        # Redelivered updates and tasks sent again are dropped before any Sheets call
+        dedupe = context.bot_data["dedupe"]
+        if dedupe.seen_message(chat.id, message.message_id):
+            metrics.inc("duplicates_dropped_total", len(tasks), kind="message")
+            return
+        new_tasks, keys = dedupe.new_tasks(chat.id, tasks)
+        duplicates = len(tasks) - len(new_tasks)
+        if duplicates:
+            metrics.inc("duplicates_dropped_total", duplicates, kind="task")
+        if not new_tasks:
+            await message.reply_text("♻️ Already added; those task(s) were sent recently.")
+            return
+
+        # Queue all tasks of the message as one batch so Sheets I/O
+        # doesn't block other chats
+        rows = [build_task_row(task, user.full_name) for task in new_tasks]
+        try:
+            future = context.bot_data["write_queue"].submit(chat.id, chat_name, rows)
+        except Exception as e:
+            print(f"❌ Failed to record tasks: {e}")
+            dedupe.forget(keys)
             await message.reply_text("❌ Failed to add tasks. Please try again later.")
+            return
 
+        # Acknowledge at once; the reply is edited with the result when the write lands.
+        # The future is never awaited here: the chat's next update waits for this
+        # handler, so awaiting would hold it for the flush window and the write.
+        await context.bot_data["status_replies"].track(message, future, len(rows), duplicates)
 
+
+def get_chat_name(chat, user):
+    """Name of the sheet tab for a chat"""
+    if chat.type == "private":
+        return f"Private_{user.username or user.first_name}"
+    return chat.title
+
+
+@metrics.instrument_handler
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /start command"""
     await update.message.reply_text(
@@ -65,18 +129,33 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@metrics.instrument_handler
 async def sheet_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Send the Google Sheet link"""
-    sheet_url = get_spreadsheet_url()
-    if sheet_url:
-        await update.message.reply_text(f"📊 Here's the task list: {sheet_url}")
-    else:
+    """Send the Google Sheet link (the sheet holding this chat's tab first)"""
+    chat = update.effective_chat
+    chat_name = get_chat_name(chat, update.effective_user)
+    sheet_url = await asyncio.to_thread(get_spreadsheet_url, chat.id, chat_name)
+    if not sheet_url:
         await update.message.reply_text("❌ Unable to retrieve the sheet link.")
+        return
 
+    message = f"📊 Here's the task list: {sheet_url}"
+    other_sheets = [
+        (name, url)
+        for name, url in await asyncio.to_thread(get_spreadsheet_urls)
+        if url != sheet_url
+    ]
+    if other_sheets:
+        message += "\n\nOther task sheets:\n"
+        for name, url in other_sheets:
+            message += f"{name}: {url}\n"
+    await update.message.reply_text(message)
 
+
+@metrics.instrument_handler
 async def tabs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List all available tabs"""
-    tabs = get_all_worksheets()
+    tabs = await asyncio.to_thread(get_all_worksheets)
 
     if tabs:
         message = "📊 Available task lists:\n\n"
@@ -87,9 +166,10 @@ async def tabs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("No task lists created yet.")
 
 
+@metrics.instrument_handler
 async def summary_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show task summary across all tabs"""
-    summary = get_worksheet_summary()
+    summary = await asyncio.to_thread(get_worksheet_summary)
 
     if summary:
         message = "📈 Task Summary:\n\n"
@@ -105,15 +185,268 @@ async def summary_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("No task lists created yet.")
 
 
-def create_bot():
-    """Create and configure the bot"""
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+@metrics.instrument_handler
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show handler latency, Sheets operations and queue gauges (admins only)"""
+    if not update.effective_user or update.effective_user.id not in ADMIN_USERS:
+        return
+
+    registry = metrics.REGISTRY
+    message = "📈 Bot Stats\n\nHandlers (calls, avg, p99):\n"
+    for labels, (count, mean, _, p99) in sorted(
+        registry.histogram_summary("bot_handler_seconds").items()
+    ):
+        message += f"{dict(labels)['handler']}: {count}, {mean * 1000:.0f} ms, ≤{_ms(p99)}\n"
+
+    message += "\nSheets operations (calls, avg, p99):\n"
+    for labels, (count, mean, _, p99) in sorted(
+        registry.histogram_summary("sheets_operation_seconds").items()
+    ):
+        message += f"{dict(labels)['operation']}: {count}, {mean * 1000:.0f} ms, ≤{_ms(p99)}\n"
+
+    message += "\nGoogle API calls:\n"
+    for labels, count in sorted(
+        registry.counter_values("google_api_requests_total").items()
+    ):
+        message += f"{dict(labels)['endpoint']} ({dict(labels)['kind']}): {count}\n"
+
+    message += "\nSheets session:\n"
+    for labels, count in sorted(
+        registry.counter_values("sheets_session_events_total").items()
+    ):
+        message += f"{dict(labels)['event']}: {count}\n"
+
+    message += "\nGauges:\n"
+    for (name, labels), value in sorted(registry.gauge_values().items()):
+        message += f"{name}: {value}\n"
+
+    await update.message.reply_text(message)
+
+
+def task_scope(update):
+    """Tab whose tasks a query covers; None (all tabs) for authorized users in private chats"""
+    chat = update.effective_chat
+    user = update.effective_user
+    if chat.type == "private" and user and user.id in AUTHORIZED_USERS:
+        return None
+    return sanitize_title(get_chat_name(chat, user))
+
+
+def format_tasks(title, tasks, tab=None):
+    """Render task rows from the local store as a reply"""
+    if not tasks:
+        return f"{title}\n\nNo matching tasks."
+
+    lines = [f"{title} ({len(tasks)}{'+' if len(tasks) >= TASK_LIST_LIMIT else ''}):", ""]
+    for task in tasks:
+        line = f"#{task['task_number']} {task['task']}"
+        details = [d for d in (task["status"], task["owner"]) if d]
+        if task["due_date"]:
+            details.append(f"due {task['due_date']}")
+        if details:
+            line += f" ({', '.join(details)})"
+        if tab is None:
+            line = f"[{task['tab']}] {line}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@metrics.instrument_handler
+async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List open tasks of this chat, or tasks with a given status: /tasks [status]"""
+    tab = task_scope(update)
+    status = " ".join(context.args).strip()
+    store = get_task_store()
+    if status:
+        tasks = await asyncio.to_thread(
+            store.tasks, tab, status=status, limit=TASK_LIST_LIMIT
+        )
+        title = f"📋 Tasks with status {status}"
+    else:
+        tasks = await asyncio.to_thread(
+            store.tasks, tab, exclude_statuses=ARCHIVE_STATUSES, limit=TASK_LIST_LIMIT
+        )
+        title = "📋 Open tasks"
+    await update.message.reply_text(format_tasks(title, tasks, tab))
+
+
+@metrics.instrument_handler
+async def due_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List open tasks by due date: /due [today|tomorrow|week|overdue|YYYY-MM-DD]"""
+    today = datetime.date.today()
+    when = (context.args[0] if context.args else "today").lower()
+    if when == "today":
+        start, end = today, today
+    elif when == "tomorrow":
+        start = end = today + datetime.timedelta(days=1)
+    elif when == "week":
+        start, end = today, today + datetime.timedelta(days=7)
+    elif when == "overdue":
+        start, end = None, today - datetime.timedelta(days=1)
+    else:
+        try:
+            start = end = datetime.date.fromisoformat(when)
+        except ValueError:
+            await update.message.reply_text(
+                "Usage: /due [today|tomorrow|week|overdue|YYYY-MM-DD]"
+            )
+            return
+
+    tab = task_scope(update)
+    tasks = await asyncio.to_thread(
+        get_task_store().due,
+        start.isoformat() if start else None,
+        end.isoformat(),
+        tab=tab,
+        exclude_statuses=ARCHIVE_STATUSES,
+        limit=TASK_LIST_LIMIT,
+    )
+    title = {"overdue": "Overdue", "week": "Due this week"}.get(when, f"Due {when}")
+    await update.message.reply_text(format_tasks(f"📅 {title}", tasks, tab))
+
+
+@metrics.instrument_handler
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Full-text search of task descriptions and notes: /search <text>"""
+    text = " ".join(context.args).strip()
+    if not text:
+        await update.message.reply_text("Usage: /search <text>")
+        return
+
+    tab = task_scope(update)
+    tasks = await asyncio.to_thread(
+        get_task_store().search, text, tab=tab, limit=TASK_LIST_LIMIT
+    )
+    await update.message.reply_text(format_tasks(f"🔍 Tasks matching “{text}”", tasks, tab))
+
+
+@metrics.instrument_handler
+async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Overdue, owner, category, age and weekly trend figures for this chat's tasks"""
+    tab = task_scope(update)
+    try:
+        report = await asyncio.to_thread(get_task_report().text, tab)
+    except Exception as e:
+        print(f"❌ Failed to build report: {e}")
+        await update.message.reply_text("❌ Failed to build the report, please try again later.")
+        return
+    await update.message.reply_text(report)
+
+
+@metrics.instrument_handler
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Send the tasks as a spreadsheet file: /export [tab|all] [csv|xlsx]"""
+    args = list(context.args)
+    fmt = "xlsx"
+    if args and args[-1].lower() in EXPORT_FORMATS:
+        fmt = args.pop().lower()
+
+    tab = task_scope(update)
+    if args:
+        # Other chats' tabs are only for authorized users
+        user = update.effective_user
+        if not user or user.id not in AUTHORIZED_USERS:
+            await update.message.reply_text("❌ You can only export this chat's tasks.")
+            return
+        name = " ".join(args)
+        tab = None if name.lower() == "all" else sanitize_title(name)
+
+    await update.message.reply_text("📦 Preparing export…")
+    try:
+        # Reading the sheets and writing the file stay off the event loop
+        path, tabs = await asyncio.to_thread(export_tasks, tab, fmt)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        await update.message.reply_text("❌ Export failed, please try again later.")
+        return
+
+    if path is None:
+        await update.message.reply_text("No task lists to export.")
+        return
+    try:
+        with open(path, "rb") as f:
+            await update.message.reply_document(
+                f,
+                filename=export_filename(tab, fmt),
+                caption=f"📤 Tasks from {tabs} tab(s)",
+            )
+    finally:
+        os.remove(path)
+
+
+def _ms(seconds):
+    return "∞" if seconds == float("inf") else f"{seconds * 1000:.0f} ms"
+
+
+async def startup_phase(name, awaitable):
+    """Await one startup step, recording its duration"""
+    with metrics.timer("startup_seconds", phase=name):
+        return await awaitable
+
+
+async def run_periodically(job, interval, first_delay=0):
+    """Run a blocking maintenance job off the event loop every interval seconds"""
+    await asyncio.sleep(first_delay)
+    while True:
+        await asyncio.to_thread(job)
+        await asyncio.sleep(interval)
+
+
+def create_bot(profile=False):
+    """Create and configure the bot
+
+    With profile=True, startup only does the work being timed: it writes
+    nothing to the sheets, binds no port and starts no background jobs.
+    """
+    # Chats are handled in parallel; updates within one chat stay in order
+    update_processor = ChatOrderedUpdateProcessor()
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(update_processor)
+        .build()
+    )
+    # Due-date reminders need the JobQueue (python-telegram-bot[job-queue])
+    reminders = None
+    if app.job_queue is not None:
+        reminders = ReminderScheduler(app.job_queue)
+    else:
+        print("❌ JobQueue unavailable, due-date reminders are disabled")
+    app.bot_data["reminders"] = reminders
+    app.bot_data["profiling"] = profile
+
+    write_queue = SheetWriteQueue(
+        outbox=Outbox(), on_written=reminders.add if reminders else None
+    )
+    app.bot_data["write_queue"] = write_queue
+    app.bot_data["dedupe"] = Deduplicator()
+    app.bot_data["status_replies"] = StatusReplies(journaled=write_queue.outbox is not None)
+
+    # Gauges are read when /metrics or /stats is requested
+    metrics.set_gauge("write_queue_depth", lambda: write_queue.depth)
+    metrics.set_gauge("write_queue_chats_in_flight", lambda: write_queue.in_flight)
+    metrics.set_gauge("outbox_dead_letters", write_queue.outbox.dead_count)
+    metrics.set_gauge("api_scheduler_queue_depth", lambda: get_scheduler().queue_depth)
+    metrics.set_gauge("update_chats_active", lambda: update_processor.active_chats)
+    # Session stats only ever go up, so they are counters
+    for name in get_session_stats():
+        metrics.set_counter(
+            "sheets_session_events_total",
+            lambda name=name: get_session_stats()[name],
+            event=name,
+        )
 
     # Add command handlers
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("sheet", sheet_command))
     app.add_handler(CommandHandler("tabs", tabs_command))
     app.add_handler(CommandHandler("summary", summary_command))
+    app.add_handler(CommandHandler("tasks", tasks_command))
+    app.add_handler(CommandHandler("due", due_command))
+    app.add_handler(CommandHandler("search", search_command))
+    app.add_handler(CommandHandler("report", report_command))
+    app.add_handler(CommandHandler("export", export_command))
+    app.add_handler(CommandHandler("stats", stats_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
     # Set up commands for the command menu
@@ -124,12 +457,95 @@ def create_bot():
         ),
         BotCommand("tabs", "List all available tabs/groups"),
         BotCommand("summary", "Show task count summary"),
+        BotCommand("tasks", "List open tasks, or tasks with a status"),
+        BotCommand("due", "Tasks due today, tomorrow, this week or overdue"),
+        BotCommand("search", "Search tasks by text"),
+        BotCommand("report", "Overdue, owner and category breakdowns and trends"),
+        BotCommand("export", "Download tasks as an Excel or CSV file"),
     ]
 
     # Set the commands during startup
     async def setup_hook(self):
-        await self.bot.set_my_commands(commands)
+        profiling = self.bot_data["profiling"]
+        if not profiling:
+            self.bot_data["metrics_server"] = metrics.start_metrics_server()
+
+        # Authenticate, open the spreadsheets and prefetch worksheet metadata
+        # while the command menu is registered, all before updates are fetched
+        await asyncio.gather(
+            startup_phase("commands", self.bot.set_my_commands(commands)),
+            startup_phase("sheets_warm_up", asyncio.to_thread(warm_up_sheets)),
+        )
+
+        # Sync anything journaled but not written before the last shutdown
+        if not profiling:
+            with metrics.timer("startup_seconds", phase="outbox_replay"):
+                write_queue = self.bot_data["write_queue"]
+                write_queue.outbox.prune()
+                write_queue.replay()
+
+        with metrics.timer("startup_seconds", phase="dedupe"):
+            self.bot_data["dedupe"].load()
+
+        reminders = self.bot_data["reminders"]
+        if reminders is not None:
+            with metrics.timer("startup_seconds", phase="reminders"):
+                await asyncio.to_thread(reminders.load)
+                if not profiling:
+                    reminders.schedule()
+
+        if profiling:
+            return
+
+        # Maintenance jobs; the store sync also fills the read model after a restart
+        jobs = self.bot_data["background_jobs"] = []
+        if TASK_STORE_SYNC_MINUTES > 0:
+            jobs.append(
+                asyncio.create_task(
+                    run_periodically(sync_task_store, TASK_STORE_SYNC_MINUTES * 60)
+                )
+            )
+        if SHEET_SYNC_SECONDS > 0:
+            jobs.append(
+                asyncio.create_task(
+                    run_periodically(
+                        sync_sheet_changes, SHEET_SYNC_SECONDS, SHEET_SYNC_SECONDS
+                    )
+                )
+            )
+        if ARCHIVE_INTERVAL_HOURS > 0:
+            jobs.append(
+                asyncio.create_task(
+                    run_periodically(
+                        archive_tasks, ARCHIVE_INTERVAL_HOURS * 3600, ARCHIVE_FIRST_DELAY
+                    )
+                )
+            )
+
+    # Flush queued task writes before exiting
+    async def stop_hook(self):
+        # Finish queued writes while the bot can still edit their status replies
+        await self.bot_data["write_queue"].stop()
+        await self.bot_data["status_replies"].stop()
+
+    async def shutdown_hook(self):
+        for job in self.bot_data.get("background_jobs", []):
+            job.cancel()
+
+        write_queue = self.bot_data["write_queue"]
+        await write_queue.stop()
+        write_queue.outbox.close()
+        self.bot_data["dedupe"].close()
+        get_task_store().close()
+        if self.bot_data["reminders"] is not None:
+            self.bot_data["reminders"].close()
+
+        metrics_server = self.bot_data.get("metrics_server")
+        if metrics_server is not None:
+            metrics.stop_metrics_server(metrics_server)
 
     app.post_init = setup_hook
+    app.post_stop = stop_hook
+    app.post_shutdown = shutdown_hook
 
     return app
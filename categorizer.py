@@ -0,0 +1,105 @@
+import os
+import re
+import json
+
+# Optional JSON file mapping category -> list of keywords, in priority order
+TASK_CATEGORIES_FILE = os.getenv("TASK_CATEGORIES_FILE")
+
+DEFAULT_CATEGORY = "General"
+
+# Earlier categories win when a task mentions keywords of several
+DEFAULT_CATEGORIES = {
+    "Meeting": ["meeting", "call"],
+    "Review": ["review", "check"],
+    "Documentation": ["report", "document"],
+    "Approval": ["approval"],
+}
+
+
+class Categorizer:
+    """Single-pass keyword matcher mapping task text to a category"""
+
+    def __init__(self, categories=None, default=DEFAULT_CATEGORY):
+        categories = categories if categories is not None else DEFAULT_CATEGORIES
+        self.default = default
+        self._keywords = {}  # keyword -> (rank, category)
+
+        for rank, (category, keywords) in enumerate(categories.items()):
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if keyword and keyword not in self._keywords:
+                    self._keywords[keyword] = (rank, category)
+
+        # Keywords must start a word but may carry a suffix ("calls", "reviewed")
+        if self._keywords:
+            self._pattern = re.compile(rf"\b({_trie_pattern(self._keywords)})\w*")
+        else:
+            self._pattern = None
+
+    def categorize(self, task):
+        """Return (category, matched keyword); keyword is None for the default"""
+        if self._pattern is None:
+            return self.default, None
+
+        best = None
+        for match in self._pattern.finditer(task.lower()):
+            keyword = match.group(1)
+            rank = self._keywords[keyword][0]
+            if best is None or rank < best[0]:
+                best = (rank, keyword)
+                if rank == 0:
+                    break
+
+        if best is None:
+            return self.default, None
+        return self._keywords[best[1]][1], best[1]
+
+
+def _trie_pattern(keywords):
+    """Compile keywords into a prefix-tree regex so matching cost doesn't grow per keyword"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A keyword ends here; prefer the longer keyword when it matches
+            pattern = f"(?:{pattern})?"
+        return pattern
+
+    return build(trie)
+
+
+def load_categories(path=TASK_CATEGORIES_FILE):
+    """Load the category table from JSON, falling back to the defaults"""
+    if not path:
+        return DEFAULT_CATEGORIES
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Failed to load task categories from {path}: {e}")
+        return DEFAULT_CATEGORIES
+
+
+_categorizer = None
+
+
+def get_categorizer():
+    """Return the process-wide categorizer built from the configured table"""
+    global _categorizer
+    if _categorizer is None:
+        _categorizer = Categorizer(load_categories())
+    return _categorizer
+
+
+def get_task_category(task):
+    """Determine the category of a task based on its content"""
+    return get_categorizer().categorize(task)[0]
@@ -1,62 +1,140 @@
 import re
 import datetime
 
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
 
-def extract_due_date(task_text):
-    """Extract due date from task text if mentioned"""
-    # Common date patterns
-    date_patterns = [
-        r"by\s+(tomorrow|today|next\s+week|monday|tuesday|wednesday|thursday|friday|saturday|sunday)",
-        r"due\s+(on\s+)?(tomorrow|today|next\s+week|monday|tuesday|wednesday|thursday|friday|saturday|sunday)",
-        r"(on|by)\s+(\d{1,2}(?:st|nd|rd|th)?\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}(?:st|nd|rd|th)?)",
-        r"(this|next)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)",
-        r"end\s+of\s+(week|month)",
-    ]
-
-    for pattern in date_patterns:
-        match = re.search(pattern, task_text.lower())
-        if match:
-            date_text = match.group(0)
-            today = datetime.datetime.now()
-
-            if "tomorrow" in date_text:
-                return (today + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-            elif "today" in date_text:
-                return today.strftime("%Y-%m-%d")
-            elif "next week" in date_text:
-                return (today + datetime.timedelta(days=7)).strftime("%Y-%m-%d")
-            elif "end of week" in date_text:
-                days_until_friday = (4 - today.weekday()) % 7
-                if days_until_friday == 0:
-                    days_until_friday = 7
-                return (today + datetime.timedelta(days=days_until_friday)).strftime(
-                    "%Y-%m-%d"
-                )
-            elif "end of month" in date_text:
-                next_month = today.replace(day=28) + datetime.timedelta(days=4)
-                last_day = next_month - datetime.timedelta(days=next_month.day)
-                return last_day.strftime("%Y-%m-%d")
-
-            # Handle day names
-            for i, day in enumerate(
-                [
-                    "monday",
-                    "tuesday",
-                    "wednesday",
-                    "thursday",
-                    "friday",
-                    "saturday",
-                    "sunday",
-                ]
-            ):
-                if day in date_text:
-                    days_until = (i - today.weekday()) % 7
-                    if "next" in date_text:
-                        days_until += 7
-                    if days_until == 0 and "this" not in date_text:
-                        days_until = 7
-                    return (today + datetime.timedelta(days=days_until)).strftime(
-                        "%Y-%m-%d"
-                    )
+MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
 
+_WEEKDAY = "|".join(WEEKDAYS)
+_MONTH = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_ORDINAL = r"(?:st|nd|rd|th)?"
+_LEAD = r"(?:by|due(?:\s+on)?|on)\s+"
+
+# All supported due date phrases as one alternation, so a task is scanned once
+_DUE_DATE_RE = re.compile(
+    rf"""\b(?:
+        (?:by|due(?:\s+on)?)\s+(?P<relative>tomorrow|today|next\s+week)
+      | (?:(?P<modifier>this|next)\s+|{_LEAD})(?P<weekday>{_WEEKDAY})
+      | {_LEAD}(?:
+            (?P<day_first>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?(?P<month_last>{_MONTH})
+          | (?P<month_first>{_MONTH})\s+(?P<day_last>\d{{1,2}}){_ORDINAL}
+        )
+      | {_LEAD}(?P<iso>\d{{4}}-\d{{2}}-\d{{2}})
+      | end\s+of\s+(?:the\s+)?(?P<period>week|month)
+    )\b""",
+    re.VERBOSE,
+)
+
+_WEEKDAY_INDEX = {day: i for i, day in enumerate(WEEKDAYS)}
+
+
+def extract_due_date(task_text, reference=None, tz=None):
+    """Extract due date from task text if mentioned
+
+    reference is the date (or datetime) relative dates are counted from and
+    defaults to now in tz, which may be a tzinfo or an IANA zone name.
+    """
+    # Lowercase once; the pattern is matched case-sensitively
+    match = _DUE_DATE_RE.search(task_text.lower())
+    if not match:
+        return None
+
+    due = _resolve(match, _reference_date(reference, tz))
+    return due.isoformat() if due else None
+
+
+def _reference_date(reference, tz):
+    if reference is None:
+        if isinstance(tz, str):
+            from zoneinfo import ZoneInfo
+
+            tz = ZoneInfo(tz)
+        return datetime.datetime.now(tz).date()
+    if isinstance(reference, datetime.datetime):
+        return reference.date()
+    return reference
+
+
+def _resolve(match, today):
+    # The last group that matched tells which alternative was found
+    kind = match.lastgroup
+
+    if kind == "relative":
+        relative = match.group("relative")
+        if relative == "tomorrow":
+            return today + datetime.timedelta(days=1)
+        if relative == "today":
+            return today
+        return today + datetime.timedelta(days=7)  # next week
+
+    if kind == "weekday":
+        modifier = match.group("modifier")
+        days_until = (_WEEKDAY_INDEX[match.group("weekday")] - today.weekday()) % 7
+        if modifier == "next":
+            days_until += 7
+        if days_until == 0 and modifier != "this":
+            days_until = 7
+        return today + datetime.timedelta(days=days_until)
+
+    if kind == "month_last":
+        return _next_month_day(
+            today, MONTHS[match.group("month_last")[:3]], int(match.group("day_first"))
+        )
+
+    if kind == "day_last":
+        return _next_month_day(
+            today, MONTHS[match.group("month_first")[:3]], int(match.group("day_last"))
+        )
+
+    if kind == "iso":
+        try:
+            return datetime.date.fromisoformat(match.group("iso"))
+        except ValueError:
+            return None
+
+    if match.group("period") == "week":
+        days_until_friday = (4 - today.weekday()) % 7
+        if days_until_friday == 0:
+            days_until_friday = 7
+        return today + datetime.timedelta(days=days_until_friday)
+
+    # End of month
+    next_month = today.replace(day=28) + datetime.timedelta(days=4)
+    return next_month - datetime.timedelta(days=next_month.day)
+
+
+def _next_month_day(today, month, day):
+    """Return the next occurrence of month/day on or after today"""
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = datetime.date(year, month, day)
+        except ValueError:
+            # e.g. 30 feb, or 29 feb outside a leap year
+            continue
+        if candidate >= today:
+            return candidate
     return None
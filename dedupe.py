@@ -0,0 +1,198 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Local record of recently ingested messages and tasks, so duplicates are caught after a restart
+DEDUPE_FILE = os.getenv("DEDUPE_FILE", "dedupe.sqlite3")
+
+# Seconds a task is remembered per chat; sending it again within this window is ignored (0 disables)
+DEDUPE_WINDOW_SECONDS = float(os.getenv("DEDUPE_WINDOW_SECONDS", "600"))
+
+# Keys kept in memory; older ones are still checked in the local store
+DEDUPE_CACHE_SIZE = int(os.getenv("DEDUPE_CACHE_SIZE", "10000"))
+
+# Telegram keeps undelivered updates for 24 hours, so message ids are remembered that long
+MESSAGE_TTL_SECONDS = 86400
+
+
+class RecentKeys:
+    """Bounded LRU of keys with an expiry time each"""
+
+    def __init__(self, capacity=DEDUPE_CACHE_SIZE):
+        self.capacity = capacity
+        self._keys = OrderedDict()  # key -> expires_at, least recently used first
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, now=None):
+        """Return the key's expiry time, or None if it isn't known or has expired"""
+        expires_at = self._keys.get(key)
+        if expires_at is None:
+            return None
+        if expires_at <= (now or time.time()):
+            del self._keys[key]
+            return None
+        self._keys.move_to_end(key)
+        return expires_at
+
+    def add(self, key, expires_at):
+        self._keys[key] = expires_at
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+            self.evicted += 1
+
+    def discard(self, key):
+        self._keys.pop(key, None)
+
+
+class DedupeStore:
+    """SQLite (WAL) table of ingested keys and when they expire"""
+
+    def __init__(self, path=DEDUPE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add(self, entries):
+        """Record (key, expires_at) pairs"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen (key, expires_at) VALUES (?, ?)", entries
+            )
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM seen WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            return row[0] if row else None
+
+    def recent(self, now, limit):
+        """Return the live (key, expires_at) pairs that expire last"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, expires_at FROM seen WHERE expires_at > ? "
+                "ORDER BY expires_at DESC LIMIT ?",
+                (now, limit),
+            ).fetchall()
+
+    def remove(self, keys):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM seen WHERE key = ?", [(k,) for k in keys])
+
+    def prune(self, now=None):
+        """Delete expired keys"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM seen WHERE expires_at <= ?", (now or time.time(),)
+            ).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Deduplicator:
+    """Drop redelivered messages and re-sent tasks before they reach the write queue
+
+    A message is known by its chat and message id, which stay the same when
+    Telegram redelivers the update. A task is known by a hash of its
+    normalized text per chat, for DEDUPE_WINDOW_SECONDS. Lookups hit an
+    in-memory LRU; the local store survives restarts and answers for keys the
+    LRU has evicted.
+    """
+
+    def __init__(self, store=None, window=DEDUPE_WINDOW_SECONDS, capacity=DEDUPE_CACHE_SIZE):
+        self.store = store or DedupeStore()
+        self.window = window
+        self._recent = RecentKeys(capacity)
+        # The store held more live keys at load time than the LRU could take
+        self._overflow = False
+        self.stats = {"messages": 0, "tasks": 0}
+
+    def load(self):
+        """Prune expired keys and warm the LRU with the newest ones"""
+        now = time.time()
+        self.store.prune(now)
+        capacity = self._recent.capacity
+        entries = self.store.recent(now, capacity + 1)
+        self._overflow = len(entries) > capacity
+        for key, expires_at in reversed(entries[:capacity]):
+            self._recent.add(key, expires_at)
+
+    def seen_message(self, chat_id, message_id):
+        """Record a message; True if it was already handled"""
+        key = f"m:{chat_id}:{message_id}"
+        if self._seen(key):
+            self.stats["messages"] += 1
+            return True
+        self._remember([key], MESSAGE_TTL_SECONDS)
+        return False
+
+    def new_tasks(self, chat_id, tasks):
+        """Record tasks of a chat; returns (new tasks, their keys) without recent repeats"""
+        if self.window <= 0:
+            return tasks, []
+
+        fresh, keys = [], []
+        for task in tasks:
+            key = f"t:{chat_id}:{task_fingerprint(task)}"
+            if key in keys or self._seen(key):
+                self.stats["tasks"] += 1
+                continue
+            fresh.append(task)
+            keys.append(key)
+        self._remember(keys, self.window)
+        return fresh, keys
+
+    def forget(self, keys):
+        """Drop keys of tasks that couldn't be queued, so sending them again works"""
+        for key in keys:
+            self._recent.discard(key)
+        if keys:
+            self.store.remove(keys)
+
+    def _seen(self, key):
+        now = time.time()
+        if self._recent.get(key, now) is not None:
+            return True
+        # Only keys pushed out of the LRU, or never loaded into it, need the slower lookup
+        if self._recent.evicted or self._overflow:
+            expires_at = self.store.get(key, now)
+            if expires_at is not None:
+                self._recent.add(key, expires_at)
+                return True
+        return False
+
+    def _remember(self, keys, ttl):
+        if not keys:
+            return
+        expires_at = time.time() + ttl
+        for key in keys:
+            self._recent.add(key, expires_at)
+        self.store.add([(key, expires_at) for key in keys])
+
+    def close(self):
+        self.store.close()
+
+
+def task_fingerprint(task):
+    """Hash of a task's text ignoring case, spacing and trailing punctuation"""
+    text = re.sub(r"\s+", " ", task.casefold()).strip(" .!,;")
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
@@ -1,9 +1,27 @@
 import os
+import time
+import atexit
 import datetime
+import threading
 from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Alignment, NamedStyle
 from config import EXCEL_FILE
 from date_parser import extract_due_date
+from categorizer import get_task_category
+from task_layout import HEADERS, COLUMN_WIDTHS, style_header_cell, thin_border
+
+# Save to disk after this many new rows or seconds, whichever comes first
+EXCEL_FLUSH_ROWS = int(os.getenv("EXCEL_FLUSH_ROWS", "20"))
+EXCEL_FLUSH_SECONDS = float(os.getenv("EXCEL_FLUSH_SECONDS", "5"))
+
+CENTER_COLUMNS = [1, 2, 5, 6, 7, 8]  # 1-indexed columns to center
+
+# Workbook kept open between tasks; saved by flush_excel()
+_workbook = None
+_pending_rows = 0
+_last_flush = time.monotonic()
+_flush_timer = None
+_lock = threading.RLock()
 
 
 def append_task_to_excel(task, from_user, full_message):
@@ -17,41 +35,32 @@ def append_task_to_excel(task, from_user, full_message):
             "%Y-%m-%d"
         )
 
-    # Create file if it doesn't exist
-    if not os.path.exists(EXCEL_FILE):
-        _create_excel_file()
-        task_number = 1
-    else:
-        wb = load_workbook(EXCEL_FILE)
-        ws = wb.active
-        task_number = ws.max_row
-
     try:
         # Determine category
-        category = _get_task_category(task)
-
-        # Open workbook and add task
-        wb = load_workbook(EXCEL_FILE)
-        ws = wb.active
-
-        # Add task row
-        ws.append(
-            [
-                task_number,
-                category,
-                task,
-                "",  # Sub-tasks
-                from_user,
-                due_date,
-                "New",
-                timestamp,
-            ]
-        )
-
-        # Format row
-        _format_row(ws, ws.max_row)
+        category = get_task_category(task)
+
+        with _lock:
+            ws = _get_workbook().active
+            task_number = ws.max_row
+
+            # Add task row
+            ws.append(
+                [
+                    task_number,
+                    category,
+                    task,
+                    "",  # Sub-tasks
+                    from_user,
+                    due_date,
+                    "New",
+                    timestamp,
+                ]
+            )
+
+            # Format row
+            _format_row(ws, ws.max_row)
+            _row_added()
 
-        wb.save(EXCEL_FILE)
         print(f"✅ Task added to Excel: '{task[:30]}...' from {from_user}")
         return True
     except Exception as e:
@@ -59,6 +68,58 @@ def append_task_to_excel(task, from_user, full_message):
         return False
 
 
+def flush_excel():
+    """Save pending rows to disk atomically"""
+    global _pending_rows, _last_flush, _flush_timer
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if _workbook is None or _pending_rows == 0:
+            return
+
+        try:
+            _save_atomic(_workbook)
+            _pending_rows = 0
+            _last_flush = time.monotonic()
+        except Exception as e:
+            print(f"❌ Failed to save Excel file: {e}")
+
+
+def _row_added():
+    global _pending_rows, _flush_timer
+    _pending_rows += 1
+    if (
+        _pending_rows >= EXCEL_FLUSH_ROWS
+        or time.monotonic() - _last_flush >= EXCEL_FLUSH_SECONDS
+    ):
+        flush_excel()
+    elif _flush_timer is None:
+        # Make sure a quiet period still gets the rows onto disk
+        _flush_timer = threading.Timer(EXCEL_FLUSH_SECONDS, flush_excel)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def _get_workbook():
+    """Return the in-memory workbook, loading or creating it on first use"""
+    global _workbook
+    if _workbook is None:
+        if os.path.exists(EXCEL_FILE):
+            _workbook = load_workbook(EXCEL_FILE)
+        else:
+            _workbook = _create_excel_file()
+        _register_styles(_workbook)
+    return _workbook
+
+
+def _save_atomic(wb):
+    """Write to a temp file next to EXCEL_FILE, then rename it into place"""
+    tmp_file = f"{EXCEL_FILE}.tmp"
+    wb.save(tmp_file)
+    os.replace(tmp_file, EXCEL_FILE)
+
+
 def _create_excel_file():
     """Create new Excel file with headers and formatting"""
     wb = Workbook()
@@ -66,91 +127,44 @@ def _create_excel_file():
     ws.title = "Tasks"
 
     # Add headers
-    headers = [
-        "#",
-        "Category",
-        "Task / Description",
-        "Sub-Tasks / Notes",
-        "Owner",
-        "Due Date",
-        "Status",
-        "Created Date",
-    ]
-    ws.append(headers)
-
-    # Define styles
-    header_font = Font(bold=True)
-    header_fill = PatternFill(
-        start_color="D9E1F2", end_color="D9E1F2", fill_type="solid"
-    )
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+    ws.append(HEADERS)
 
     # Apply styles to header row
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(row=1, column=col)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
+    for col in range(1, len(HEADERS) + 1):
+        style_header_cell(ws.cell(row=1, column=col))
 
     # Set column widths
-    column_widths = {
-        "A": 5,
-        "B": 15,
-        "C": 40,
-        "D": 30,
-        "E": 15,
-        "F": 15,
-        "G": 12,
-        "H": 15,
-    }
-
-    for col, width in column_widths.items():
+    for col, width in COLUMN_WIDTHS.items():
         ws.column_dimensions[col].width = width
 
     # Add auto-filter
     ws.auto_filter.ref = f"A1:H1"
 
-    wb.save(EXCEL_FILE)
+    _save_atomic(wb)
     print("📄 Created new Excel file with improved formatting.")
+    return wb
 
 
-def _format_row(ws, row_num):
-    """Apply formatting to a data row"""
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+def _register_styles(wb):
+    """Register the shared named styles used by task rows"""
+    if "task_cell" not in wb.named_styles:
+        style = NamedStyle(name="task_cell")
+        style.border = thin_border()
+        wb.add_named_style(style)
 
-    center_cols = [1, 2, 5, 6, 7, 8]  # Columns to center
+    if "task_cell_center" not in wb.named_styles:
+        style = NamedStyle(name="task_cell_center")
+        style.border = thin_border()
+        style.alignment = Alignment(horizontal="center", vertical="center")
+        wb.add_named_style(style)
 
+
+def _format_row(ws, row_num):
+    """Apply formatting to a data row"""
     for col in range(1, 9):
         cell = ws.cell(row=row_num, column=col)
-        cell.border = border
-
-        if col in center_cols:
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-
-def _get_task_category(task):
-    """Determine the category of a task based on its content"""
-    task_lower = task.lower()
-
-    if "meeting" in task_lower or "call" in task_lower:
-        return "Meeting"
-    elif "review" in task_lower or "check" in task_lower:
-        return "Review"
-    elif "report" in task_lower or "document" in task_lower:
-        return "Documentation"
-    elif "approval" in task_lower:
-        return "Approval"
-    else:
-        return "General"
+        cell.style = "task_cell_center" if col in CENTER_COLUMNS else "task_cell"
+
+
+# Don't lose buffered rows on a normal interpreter exit
+atexit.register(flush_excel)
@@ -0,0 +1,163 @@
+import os
+import csv
+import datetime
+import tempfile
+from gspread.utils import absolute_range_name
+from shards import get_shards
+from api_scheduler import get_scheduler, PRIORITY_BACKGROUND
+from task_layout import HEADERS, COLUMN_WIDTHS, style_header_cell
+import metrics
+
+# Most sheet rows held in memory at once while exporting
+EXPORT_PAGE_ROWS = int(os.getenv("EXPORT_PAGE_ROWS", "5000"))
+
+EXPORT_FORMATS = ("xlsx", "csv")
+
+
+def export_tasks(tab=None, fmt="xlsx", page_rows=EXPORT_PAGE_ROWS):
+    """Export one tab (or all tabs when tab is None) to a temp file; returns (path, tabs)
+
+    Rows are read in pages and streamed to a CSV file or a write-only workbook,
+    so memory stays flat however many rows the sheets hold. The caller deletes
+    the file. Returns (None, 0) if there is nothing to export.
+    """
+    worksheets = [
+        (session, ws)
+        for session in get_shards().sessions()
+        for ws in session.worksheets.all()
+        if tab is None or ws.title == tab
+    ]
+    if not worksheets:
+        return None, 0
+
+    fd, path = tempfile.mkstemp(prefix="tasks_export_", suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        # Exports yield to user-facing task writes
+        with get_scheduler().priority(PRIORITY_BACKGROUND), metrics.timer(
+            "sheets_operation_seconds", operation="export"
+        ):
+            if fmt == "csv":
+                _write_csv(path, worksheets, page_rows, with_tab=tab is None)
+            else:
+                _write_xlsx(path, worksheets, page_rows)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, len(worksheets)
+
+
+def export_filename(tab, fmt):
+    label = tab or "all"
+    return f"tasks_{label}_{datetime.date.today().isoformat()}.{fmt}".replace(" ", "_")
+
+
+def _write_csv(path, worksheets, page_rows, with_tab):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow((["Tab"] if with_tab else []) + HEADERS)
+        for ws, rows in _iter_rows(worksheets, page_rows):
+            prefix = [ws.title] if with_tab else []
+            writer.writerows(prefix + row for row in rows)
+
+
+def _write_xlsx(path, worksheets, page_rows):
+    # Only exports need openpyxl; keep it off the bot's import path
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    # Write-only mode streams rows to disk instead of keeping cells in memory
+    wb = Workbook(write_only=True)
+    sheets = {}
+    used_titles = set()
+    for ws, rows in _iter_rows(worksheets, page_rows):
+        sheet = sheets.get(ws.id)
+        if sheet is None:
+            sheet = sheets[ws.id] = wb.create_sheet(_sheet_title(ws.title, used_titles))
+            for col, width in COLUMN_WIDTHS.items():
+                sheet.column_dimensions[col].width = width
+            sheet.freeze_panes = "A2"
+            sheet.auto_filter.ref = "A1:H1"
+
+            header = []
+            for value in HEADERS:
+                cell = WriteOnlyCell(sheet, value=value)
+                style_header_cell(cell)
+                header.append(cell)
+            sheet.append(header)
+
+        for row in rows:
+            if row and row[0].isdigit():
+                row[0] = int(row[0])
+            sheet.append(row)
+
+    if not sheets:
+        wb.create_sheet("Tasks").append(HEADERS)
+    wb.save(path)
+
+
+def _iter_rows(worksheets, page_rows):
+    """Yield (worksheet, rows) pages of task rows without header rows
+
+    Small tabs share one values.batchGet up to page_rows grid rows; larger
+    tabs are read page by page until a page comes back empty.
+    """
+    for batch in _batches(worksheets, page_rows):
+        session = batch[0][0]
+        if len(batch) == 1 and batch[0][1].row_count > page_rows:
+            yield from _iter_pages(session, batch[0][1], page_rows)
+            continue
+
+        ranges = [absolute_range_name(ws.title, "A:H") for _, ws in batch]
+        response = session.spreadsheet.values_batch_get(ranges)
+        for (_, ws), value_range in zip(batch, response.get("valueRanges", [])):
+            yield ws, [_pad(row) for row in value_range.get("values", [])[1:]]
+
+
+def _iter_pages(session, ws, page_rows):
+    start = 2  # Skip the header row
+    yield ws, []  # Empty tabs still get their header
+    while True:
+        end = start + page_rows - 1
+        response = session.spreadsheet.values_batch_get(
+            [absolute_range_name(ws.title, f"A{start}:H{end}")]
+        )
+        values = response.get("valueRanges", [{}])[0].get("values", [])
+        if values:
+            yield ws, [_pad(row) for row in values]
+        # Trailing empty rows are trimmed, so a short page is the last one
+        if len(values) < page_rows:
+            return
+        start = end + 1
+
+
+def _batches(worksheets, page_rows):
+    """Group worksheets of the same spreadsheet into batchGets of about page_rows rows"""
+    batch, batch_rows = [], 0
+    for session, ws in worksheets:
+        rows = ws.row_count
+        if batch and (
+            batch[0][0] is not session or batch_rows + rows > page_rows
+        ):
+            yield batch
+            batch, batch_rows = [], 0
+        batch.append((session, ws))
+        batch_rows += rows
+    if batch:
+        yield batch
+
+
+def _pad(row):
+    return (list(row) + [""] * 8)[:8]
+
+
+def _sheet_title(title, used_titles):
+    """Excel limits sheet titles to 31 characters and they must be unique"""
+    base = title[:31] or "Tasks"
+    candidate, n = base, 2
+    while candidate.lower() in used_titles:
+        suffix = f" ({n})"
+        candidate = base[: 31 - len(suffix)] + suffix
+        n += 1
+    used_titles.add(candidate.lower())
+    return candidate
@@ -1,19 +1,137 @@
+import os
 import time
-from telegram.error import NetworkError
-from bot import create_bot
+import asyncio
+import secrets
+import argparse
+
+# "webhook" receives updates over HTTPS; "polling" fetches them with getUpdates.
+# Defaults to webhook mode whenever a public WEBHOOK_URL is configured.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+BOT_MODE = os.getenv("BOT_MODE", "webhook" if WEBHOOK_URL else "polling")
+
+# Local address of the webhook server (PORT is set by most hosting platforms)
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("PORT", os.getenv("WEBHOOK_PORT", "8443")))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram").strip("/")
+
+# Telegram sends this in X-Telegram-Bot-Api-Secret-Token; other requests get 403
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Updates Telegram may deliver in parallel over separate connections
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+
+def run_bot(bot, mode):
+    """Run until stopped; shutdown hooks drain queued writes either way"""
+    if mode == "webhook":
+        if not WEBHOOK_URL:
+            raise SystemExit("❌ WEBHOOK_URL must be set to run in webhook mode")
+
+        secret_token = WEBHOOK_SECRET
+        if not secret_token:
+            # Registered with Telegram on startup, so a per-run token works too
+            secret_token = secrets.token_urlsafe(32)
+            print("🔐 WEBHOOK_SECRET not set; using a random secret for this run")
+
+        print(f"🌐 Listening for webhook updates on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}")
+        bot.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+            secret_token=secret_token,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+    else:
+        # Also removes a webhook left over from a previous webhook deployment
+        bot.run_polling()
+
+
+def profile_startup():
+    """Run the cold-start sequence once and report the time of each phase"""
+    phases = []
+
+    def timed(name, started):
+        phases.append((name, time.perf_counter() - started))
+
+    # Imports are timed too, so nothing from the bot is imported at module level
+    started = time.perf_counter()
+    import telegram.ext  # noqa: F401
+
+    timed("import telegram", started)
+
+    started = time.perf_counter()
+    import bot
+    import metrics
+
+    timed("import bot modules", started)
+
+    started = time.perf_counter()
+    # Profiling mode leaves out the outbox replay, metrics server and background jobs
+    app = bot.create_bot(profile=True)
+    timed("create application", started)
+
+    async def initialize():
+        started = time.perf_counter()
+        await app.initialize()
+        timed("telegram initialize", started)
+
+        started = time.perf_counter()
+        await app.post_init(app)
+        timed("post_init", started)
+
+        await app.shutdown()
+        await app.post_shutdown(app)
+
+    asyncio.run(initialize())
+
+    print("\n⏱️ Startup profile:")
+    for name, seconds in phases:
+        print(f"  {name:<28}{seconds * 1000:>9.1f} ms")
+    print(f"  {'total':<28}{sum(s for _, s in phases) * 1000:>9.1f} ms")
+
+    # post_init and Google Sheets steps, from the metrics recorded on the way
+    for metric in ("startup_seconds", "sheets_operation_seconds"):
+        for labels, (count, mean, _, _) in sorted(
+            metrics.REGISTRY.histogram_summary(metric).items()
+        ):
+            label = ", ".join(value for _, value in labels)
+            print(f"    {label:<26}{count * mean * 1000:>9.1f} ms ({count}x)")
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CEO Tasks Bot")
+    parser.add_argument(
+        "--mode",
+        choices=["polling", "webhook"],
+        default=BOT_MODE,
+        help="how to receive updates from Telegram (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="time imports, Telegram setup and the Sheets warm-up, then exit",
+    )
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile_startup()
+        raise SystemExit(0)
+
+    from telegram.error import NetworkError
+    from bot import create_bot
+
     while True:
         try:
             bot = create_bot()
-            print("✅ Task bot is starting…")
-            # This will block until you Ctrl‑C or an unrecoverable error occurs
-            bot.run_polling()
-            # If run_polling ever returns normally, break out of the loop
+            print(f"✅ Task bot is starting ({args.mode})…")
+            # This will block until you Ctrl‑C/SIGTERM or an unrecoverable error occurs
+            run_bot(bot, args.mode)
+            # If the bot ever returns normally, break out of the loop
             break
         except NetworkError as e:
-            print("🌐 NetworkError (Bad Gateway) encountered: %s", e)
-            print("⏳ Sleeping 5s before restarting polling…")
+            print(f"🌐 NetworkError (Bad Gateway) encountered: {e}")
+            print("⏳ Sleeping 5s before restarting…")
             time.sleep(5)
         except Exception:
             print("💥 Unhandled exception, exiting")
@@ -0,0 +1,238 @@
+import os
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local endpoint serving /metrics in Prometheus text format (0 disables it)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Registry:
+    """Thread-safe counters, gauges and latency histograms keyed by name and labels"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}  # key -> [bucket counts..., +Inf count], sum
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_counter(self, name, value, **labels):
+        """Export a running total kept elsewhere, via a callable evaluated at export time"""
+        with self._lock:
+            self._counters[(name, _label_key(labels))] = value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to a value, or to a callable evaluated at export time"""
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def add_gauge(self, name, delta, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram[1] += seconds
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the enclosed block in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self):
+        """Export everything in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {k: ([*v[0]], v[1]) for k, v in self._histograms.items()}
+
+        lines = []
+        for name, samples in _by_name(counters):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                value = _sample_value(value)
+                if value is not None:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name, samples in _by_name(gauges):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                value = _sample_value(value)
+                if value is not None:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name, samples in _by_name(histograms):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total) in samples:
+                cumulative = 0
+                for bound, count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += count
+                    bucket_labels = labels + (("le", str(bound)),)
+                    lines.append(
+                        f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+    def histogram_summary(self, name):
+        """Return {labels: (count, mean, p50, p99)} with quantiles estimated from buckets"""
+        with self._lock:
+            histograms = {
+                k[1]: ([*v[0]], v[1]) for k, v in self._histograms.items() if k[0] == name
+            }
+
+        summary = {}
+        for labels, (counts, total) in histograms.items():
+            count = sum(counts)
+            if count:
+                summary[labels] = (
+                    count,
+                    total / count,
+                    self._quantile(counts, count, 0.5),
+                    self._quantile(counts, count, 0.99),
+                )
+        return summary
+
+    def counter_values(self, name):
+        """Return {labels: value} for one counter"""
+        with self._lock:
+            counters = {k[1]: v for k, v in self._counters.items() if k[0] == name}
+        return {labels: _sample_value(value) for labels, value in counters.items()}
+
+    def gauge_values(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+        return {key: _sample_value(value) for key, value in gauges.items()}
+
+    def _quantile(self, counts, count, q):
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _by_name(samples):
+    grouped = {}
+    for (name, labels), value in sorted(samples.items()):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped.items()
+
+
+def _sample_value(value):
+    if callable(value):
+        try:
+            return value()
+        except Exception:
+            return None
+    return value
+
+
+REGISTRY = Registry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+set_gauge = REGISTRY.set_gauge
+set_counter = REGISTRY.set_counter
+
+
+def instrument_handler(handler):
+    """Count and time a Telegram handler coroutine"""
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        REGISTRY.inc("bot_handler_calls_total", handler=name)
+        REGISTRY.add_gauge("bot_handlers_in_flight", 1)
+        try:
+            with REGISTRY.timer("bot_handler_seconds", handler=name):
+                return await handler(update, context)
+        except Exception:
+            REGISTRY.inc("bot_handler_errors_total", handler=name)
+            raise
+        finally:
+            REGISTRY.add_gauge("bot_handlers_in_flight", -1)
+
+    return wrapper
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are too frequent to print
+        pass
+
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics from a daemon thread; returns the server or None if disabled"""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    except OSError as e:
+        print(f"❌ Failed to start metrics endpoint on {host}:{port}: {e}")
+        return None
+
+    server.thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    server.thread.start()
+    print(f"📈 Metrics available at http://{host}:{port}/metrics")
+    return server
+
+
+def stop_metrics_server(server):
+    """Stop serving and release the port, so a restart in this process can bind it again"""
+    server.shutdown()
+    server.server_close()
+    server.thread.join()
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# Local journal of extracted tasks, written before the remote Sheets append
+OUTBOX_FILE = os.getenv("OUTBOX_FILE", "outbox.sqlite3")
+
+# Synced entries older than this are pruned at startup
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+# Rows that fail this many writes stop being replayed and stay as dead letters
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+
+
+class Outbox:
+    """Append-only SQLite (WAL) journal of tasks waiting to be synced to Sheets"""
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL + synchronous=NORMAL keeps each commit to a sequential log append
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER,
+                chat_name TEXT NOT NULL,
+                row TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                synced_at REAL,
+                task_number INTEGER,
+                uncertain INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS outbox_pending
+                ON outbox (id) WHERE synced_at IS NULL;
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "uncertain" not in columns:
+            # Journals written before failed appends were classified
+            self._conn.execute(
+                "ALTER TABLE outbox ADD COLUMN uncertain INTEGER NOT NULL DEFAULT 0"
+            )
+        self._conn.commit()
+
+    def record(self, chat_id, chat_name, rows):
+        """Journal task rows for a chat and return their outbox ids"""
+        now = time.time()
+        with self._lock, self._conn:
+            ids = []
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO outbox (chat_id, chat_name, row, created_at) VALUES (?, ?, ?, ?)",
+                    (chat_id, chat_name, json.dumps(row), now),
+                )
+                ids.append(cursor.lastrowid)
+            return ids
+
+    def mark_synced(self, ids, task_numbers):
+        """Mark journaled rows as acknowledged by Google Sheets"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET synced_at = ?, task_number = ? WHERE id = ?",
+                [(now, number, row_id) for row_id, number in zip(ids, task_numbers)],
+            )
+
+    def mark_failed(self, ids, uncertain=False, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        """Count a failed sync attempt; returns how many rows just ran out of attempts
+
+        uncertain marks rows that may have reached the sheet anyway, so the
+        replay checks the sheet before appending them again.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, uncertain = uncertain OR ? "
+                "WHERE id = ?",
+                [(bool(uncertain), row_id) for row_id in ids],
+            )
+            cursor = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE attempts = ? "
+                "AND id IN (SELECT value FROM json_each(?))",
+                (max_attempts, json.dumps(list(ids))),
+            )
+            return cursor.fetchone()[0]
+
+    def pending(self, limit=500, after_id=0, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        """Return up to limit replayable rows as (id, chat_id, chat_name, row, uncertain)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT id, chat_id, chat_name, row, uncertain FROM outbox "
+                "WHERE synced_at IS NULL AND id > ? AND attempts < ? ORDER BY id LIMIT ?",
+                (after_id, max_attempts, limit),
+            )
+            return [
+                (row_id, chat_id, chat_name, json.loads(row), bool(uncertain))
+                for row_id, chat_id, chat_name, row, uncertain in cursor.fetchall()
+            ]
+
+    def pending_count(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE synced_at IS NULL"
+            )
+            return cursor.fetchone()[0]
+
+    def dead_count(self, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        """Number of unsynced rows that are no longer replayed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE synced_at IS NULL AND attempts >= ?",
+                (max_attempts,),
+            )
+            return cursor.fetchone()[0]
+
+    def prune(self, retention_days=OUTBOX_RETENTION_DAYS):
+        """Delete synced rows older than the retention window"""
+        cutoff = time.time() - retention_days * 86400
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE synced_at IS NOT NULL AND synced_at < ?",
+                (cutoff,),
+            )
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
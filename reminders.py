@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import heapq
+import sqlite3
+import datetime
+import threading
+from sheets_session import sanitize_title
+from sheets_manager import ARCHIVE_STATUSES
+from task_store import get_task_store
+import metrics
+
+# Local journal of due-date reminders, so a restart doesn't rescan the sheets
+REMINDER_FILE = os.getenv("REMINDER_FILE", "reminders.sqlite3")
+
+# Local time of day reminders are sent, and how many days before the due date
+REMINDER_TIME = os.getenv("REMINDER_TIME", "09:00")
+REMINDER_DAYS_BEFORE = int(os.getenv("REMINDER_DAYS_BEFORE", "0"))
+
+# Sent reminders older than this are pruned at startup
+REMINDER_RETENTION_DAYS = 30
+
+
+class ReminderStore:
+    """SQLite (WAL) table of one reminder per task, plus the chat owning each tab"""
+
+    def __init__(self, path=REMINDER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reminders (
+                id INTEGER PRIMARY KEY,
+                chat_id INTEGER NOT NULL,
+                tab TEXT NOT NULL,
+                task_number INTEGER NOT NULL,
+                due_date TEXT NOT NULL,
+                remind_at REAL NOT NULL,
+                sent_at REAL,
+                UNIQUE (tab, task_number)
+            );
+            CREATE INDEX IF NOT EXISTS reminders_pending
+                ON reminders (remind_at) WHERE sent_at IS NULL;
+            CREATE TABLE IF NOT EXISTS reminder_chats (
+                tab TEXT PRIMARY KEY,
+                chat_id INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add(self, chat_id, tab, tasks, replace=True):
+        """Store reminders for (task number, due date, remind_at); returns the pending ones"""
+        if not tasks:
+            return []
+        with self._lock, self._conn:
+            if replace:
+                # A changed due date re-arms the reminder
+                sql = (
+                    "INSERT INTO reminders (chat_id, tab, task_number, due_date, remind_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (tab, task_number) DO UPDATE SET "
+                    "chat_id = excluded.chat_id, due_date = excluded.due_date, "
+                    "remind_at = excluded.remind_at, sent_at = NULL "
+                    "WHERE due_date != excluded.due_date"
+                )
+            else:
+                sql = (
+                    "INSERT OR IGNORE INTO reminders "
+                    "(chat_id, tab, task_number, due_date, remind_at) VALUES (?, ?, ?, ?, ?)"
+                )
+            self._conn.executemany(
+                sql, [(chat_id, tab, number, due, at) for number, due, at in tasks]
+            )
+            return self._pending(
+                "tab = ? AND task_number IN (SELECT value FROM json_each(?))",
+                (tab, json.dumps([number for number, _, _ in tasks])),
+            )
+
+    def remember_chat(self, tab, chat_id):
+        """Record the chat of a tab; True if the tab wasn't known before"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO reminder_chats (tab, chat_id) VALUES (?, ?)",
+                (tab, chat_id),
+            )
+            if cursor.rowcount == 0:
+                self._conn.execute(
+                    "UPDATE reminder_chats SET chat_id = ? WHERE tab = ?", (chat_id, tab)
+                )
+            return cursor.rowcount > 0
+
+    def chats(self):
+        """Return {tab: chat_id} of every chat seen writing tasks"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT tab, chat_id FROM reminder_chats"))
+
+    def pending(self):
+        """Return every unsent reminder as (remind_at, id, chat_id, tab, number, due date)"""
+        with self._lock:
+            return self._pending("1", ())
+
+    def _pending(self, where, params):
+        return [
+            tuple(row)
+            for row in self._conn.execute(
+                "SELECT remind_at, id, chat_id, tab, task_number, due_date FROM reminders "
+                f"WHERE sent_at IS NULL AND {where}",
+                params,
+            )
+        ]
+
+    def mark_sent(self, ids):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE reminders SET sent_at = ? WHERE id = ?", [(now, i) for i in ids]
+            )
+
+    def prune(self, retention_days=REMINDER_RETENTION_DAYS):
+        """Delete reminders sent longer ago than the retention window"""
+        cutoff = time.time() - retention_days * 86400
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM reminders WHERE sent_at IS NOT NULL AND sent_at < ?", (cutoff,)
+            ).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ReminderScheduler:
+    """Min-heap of pending reminders driving a single JobQueue wake-up
+
+    Only the earliest reminder has a job. Each wake-up pops the reminders that
+    are due (O(log n) each) and sends one digest per chat. New tasks push onto
+    the heap and move the wake-up earlier if needed.
+    """
+
+    def __init__(self, job_queue, store=None):
+        self.job_queue = job_queue
+        self.store = store or ReminderStore()
+        self._heap = []  # (remind_at, id, chat_id, tab, number, due date)
+        self._current = {}  # id -> remind_at of the live heap entry
+        self._job = None
+        self._job_at = None
+        self.stats = {"loaded": 0, "added": 0, "sent": 0, "skipped": 0, "digests": 0}
+
+    def load(self):
+        """Build the heap from the journal and the local task store (no Sheets calls)"""
+        self.store.prune()
+        # Tasks of known chats that predate the journal, e.g. edited in the sheet
+        for tab, chat_id in self.store.chats().items():
+            self._backfill(tab, chat_id)
+
+        entries = self.store.pending()
+        self._heap = list(entries)
+        heapq.heapify(self._heap)
+        self._current = {entry[1]: entry[0] for entry in entries}
+        self.stats["loaded"] = len(entries)
+        print(f"⏰ Loaded {len(entries)} pending reminder(s)")
+
+    def add(self, chat_id, chat_name, rows):
+        """Schedule reminders for freshly written task rows"""
+        if chat_id is None:
+            return
+        tab = sanitize_title(chat_name)
+        if self.store.remember_chat(tab, chat_id):
+            self._push(self._backfill(tab, chat_id))
+
+        now = time.time()
+        tasks = []
+        for row in rows:
+            remind_at = _remind_at(row[5])
+            # Don't remind about a task the moment it's created
+            if row[0] is not None and remind_at is not None and remind_at > now:
+                tasks.append((row[0], row[5], remind_at))
+        self._push(self.store.add(chat_id, tab, tasks))
+        self.stats["added"] += len(tasks)
+
+    def schedule(self):
+        """(Re)arm the JobQueue wake-up for the earliest pending reminder"""
+        while self._heap and self._current.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)  # Superseded by a changed due date
+        if not self._heap:
+            return
+
+        when = self._heap[0][0]
+        if self._job is not None:
+            if self._job_at is not None and self._job_at <= when:
+                return
+            self._job.schedule_removal()
+
+        delay = max(0.0, when - time.time())
+        self._job = self.job_queue.run_once(self._wake, delay, name="reminders")
+        self._job_at = when
+
+    async def _wake(self, context):
+        self._job = self._job_at = None
+        now = time.time()
+
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            remind_at, reminder_id, chat_id, tab, number, due_date = heapq.heappop(self._heap)
+            if self._current.get(reminder_id) != remind_at:
+                continue
+            del self._current[reminder_id]
+            due.setdefault((chat_id, tab), []).append((reminder_id, number, due_date))
+
+        task_store = get_task_store()
+        for (chat_id, tab), reminders in due.items():
+            tasks = task_store.lookup(tab, [number for _, number, _ in reminders])
+            lines = []
+            for _, number, due_date in reminders:
+                task = tasks.get(number)
+                # Finished, archived or rescheduled in the sheet since it was queued
+                if (
+                    task is None
+                    or task["status"].strip().lower() in ARCHIVE_STATUSES
+                    or (task["due_date"] and task["due_date"] != due_date)
+                ):
+                    self.stats["skipped"] += 1
+                    continue
+                line = f"#{number} {task['task']}"
+                if task["owner"]:
+                    line += f" ({task['owner']})"
+                if REMINDER_DAYS_BEFORE:
+                    line += f" — due {due_date}"
+                lines.append(line)
+
+            if lines:
+                title = "due today" if not REMINDER_DAYS_BEFORE else "due soon"
+                text = f"⏰ {len(lines)} task(s) {title}:\n\n" + "\n".join(lines)
+                try:
+                    await context.bot.send_message(chat_id, text)
+                    self.stats["digests"] += 1
+                    self.stats["sent"] += len(lines)
+                    metrics.inc("reminders_sent_total", len(lines))
+                except Exception as e:
+                    print(f"❌ Failed to send reminders to {tab}: {e}")
+
+            # Marked sent even on failure so a removed bot isn't retried forever
+            self.store.mark_sent([reminder_id for reminder_id, _, _ in reminders])
+
+        self.schedule()
+
+    def _push(self, entries):
+        for entry in entries:
+            self._current[entry[1]] = entry[0]
+            heapq.heappush(self._heap, entry)
+        if entries:
+            self.schedule()
+
+    def _backfill(self, tab, chat_id):
+        """Journal reminders for a tab's open tasks already in the local task store"""
+        today = datetime.date.today().isoformat()
+        now = time.time()
+        tasks = []
+        for task in get_task_store().due(
+            today, "9999-12-31", tab=tab, exclude_statuses=ARCHIVE_STATUSES, limit=-1
+        ):
+            remind_at = _remind_at(task["due_date"])
+            if remind_at is not None and remind_at > now:
+                tasks.append((task["task_number"], task["due_date"], remind_at))
+        return self.store.add(chat_id, tab, tasks, replace=False)
+
+    def close(self):
+        self.store.close()
+
+
+def _remind_at(due_date):
+    """Epoch time of the reminder for an ISO due date, or None if it isn't a date"""
+    try:
+        day = datetime.date.fromisoformat(str(due_date)[:10])
+        at = datetime.time.fromisoformat(REMINDER_TIME)
+    except ValueError:
+        return None
+    day -= datetime.timedelta(days=REMINDER_DAYS_BEFORE)
+    return datetime.datetime.combine(day, at).timestamp()
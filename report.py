@@ -0,0 +1,151 @@
+import datetime
+import threading
+from task_store import get_task_store, COLUMNS
+from sheets_manager import ARCHIVE_STATUSES
+import metrics
+
+# Weeks shown in the created-vs-due trend, ending with the current week
+REPORT_WEEKS = 8
+
+# Owners and categories listed, busiest first
+REPORT_TOP = 10
+
+# Age buckets of open tasks, in days since they were created
+AGE_BUCKETS = ((7, "< 1 week"), (30, "1-4 weeks"), (90, "1-3 months"))
+
+
+class TaskReport:
+    """Task analytics computed with pandas, cached until the next task change
+
+    All tasks are loaded from the local task store in one query into a single
+    DataFrame, and every figure is a vectorized column operation or groupby.
+    The result is kept per scope until the store's write generation moves.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self._lock = threading.Lock()
+        self._generation = None
+        self._cache = {}  # (tab or None for all, date) -> report text
+        self.stats = {"computed": 0, "cached": 0}
+
+    @property
+    def store(self):
+        return self._store or get_task_store()
+
+    def text(self, tab=None):
+        """Return the report of one tab, or of all tabs when tab is None"""
+        # Overdue counts and ages change at midnight even without writes
+        key = (tab, datetime.date.today())
+        with self._lock:
+            generation = self.store.generation
+            if generation != self._generation:
+                self._cache.clear()
+                self._generation = generation
+            if key in self._cache:
+                self.stats["cached"] += 1
+                return self._cache[key]
+
+            with metrics.timer("report_seconds"):
+                report = _format(_compute(self.store.rows(tab), key[1]))
+            self._cache[key] = report
+            self.stats["computed"] += 1
+            return report
+
+
+def _compute(rows, today):
+    """Compute the report figures from task store rows as of a date"""
+    # Only /report needs pandas; keep it off the bot's import path
+    import numpy as np
+    import pandas as pd
+
+    today = pd.Timestamp(today)
+    df = pd.DataFrame.from_records(rows, columns=("tab",) + COLUMNS)
+    if df.empty:
+        return None
+
+    status = df["status"].str.strip().str.lower()
+    due = pd.to_datetime(df["due_date"].str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    created = pd.to_datetime(
+        df["created_at"].str.slice(0, 10), format="%Y-%m-%d", errors="coerce"
+    )
+    df = df.assign(
+        owner=df["owner"].str.strip().replace("", "Unassigned"),
+        category=df["category"].str.strip().replace("", "Uncategorized"),
+        open=~status.isin(ARCHIVE_STATUSES),
+    )
+    df["overdue"] = df["open"] & (due < today)
+    df["age"] = (today - created).dt.days
+
+    def breakdown(column):
+        grouped = df.groupby(column)[["open", "overdue"]].sum()
+        grouped["total"] = df.groupby(column).size()
+        grouped = grouped.sort_values(["open", "total"], ascending=False)
+        return grouped.head(REPORT_TOP).astype(int)
+
+    open_age = df.loc[df["open"], "age"].dropna()
+    edges = [-np.inf] + [days for days, _ in AGE_BUCKETS] + [np.inf]
+    labels = [label for _, label in AGE_BUCKETS] + [f"> {AGE_BUCKETS[-1][0] // 30} months"]
+    ages = pd.cut(open_age, bins=edges, labels=labels, right=False).value_counts()
+
+    weeks = pd.period_range(end=today.to_period("W"), periods=REPORT_WEEKS, freq="W")
+    trend = pd.DataFrame(
+        {
+            "created": created.dt.to_period("W").value_counts(),
+            "due": due.dt.to_period("W").value_counts(),
+        }
+    ).reindex(weeks, fill_value=0).fillna(0).astype(int)
+
+    return {
+        "total": len(df),
+        "open": int(df["open"].sum()),
+        "overdue": int(df["overdue"].sum()),
+        "no_due_date": int((df["open"] & due.isna()).sum()),
+        "median_age": None if open_age.empty else float(open_age.median()),
+        "owners": breakdown("owner"),
+        "categories": breakdown("category"),
+        "ages": ages.reindex(labels, fill_value=0).astype(int),
+        "trend": trend,
+    }
+
+
+def _format(report):
+    if report is None:
+        return "📊 Task Report\n\nNo tasks yet."
+
+    lines = [
+        f"📊 Task Report ({report['total']} tasks)",
+        "",
+        f"Open: {report['open']}",
+        f"Overdue: {report['overdue']}",
+        f"Open without a due date: {report['no_due_date']}",
+    ]
+    if report["median_age"] is not None:
+        lines.append(f"Median age of open tasks: {report['median_age']:.0f} days")
+
+    for title, frame in (("By owner", report["owners"]), ("By category", report["categories"])):
+        lines += ["", f"{title} (open / overdue / total):"]
+        for name, row in frame.iterrows():
+            lines.append(f"{name}: {row['open']} / {row['overdue']} / {row['total']}")
+
+    lines += ["", "Age of open tasks:"]
+    lines += [f"{label}: {count}" for label, count in report["ages"].items()]
+
+    lines += ["", "Weekly created / due:"]
+    for week, row in report["trend"].iterrows():
+        lines.append(f"{week.start_time:%Y-%m-%d}: {row['created']} / {row['due']}")
+    return "\n".join(lines)
+
+
+_report = None
+_report_lock = threading.Lock()
+
+
+def get_task_report():
+    """Return the process-wide report cache"""
+    global _report
+    if _report is None:
+        with _report_lock:
+            if _report is None:
+                _report = TaskReport()
+    return _report
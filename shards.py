@@ -0,0 +1,180 @@
+import os
+import json
+import threading
+from sheets_session import SheetsSession, get_session
+import metrics
+
+# Local file mapping chats to the spreadsheet (shard) holding their tab
+SHARD_DIRECTORY_FILE = os.getenv("SHARD_DIRECTORY_FILE", ".shards.json")
+
+# Google Sheets caps a spreadsheet at 10 million cells and slows down well
+# before that; new chats go to a fresh shard once every shard is this full
+SHARD_CELL_LIMIT = int(os.getenv("SHARD_CELL_LIMIT", "5000000"))
+
+
+class ShardDirectory:
+    """Chat -> spreadsheet directory spreading tabs over several spreadsheets
+
+    The primary spreadsheet (SHEET_NAME) is always the first shard, so an
+    existing deployment keeps using it until it fills up. Usage is measured in
+    grid cells from freshly read worksheet metadata, which is what Sheets
+    counts against its limit.
+    """
+
+    def __init__(self, primary=None, path=SHARD_DIRECTORY_FILE, cell_limit=SHARD_CELL_LIMIT):
+        self.primary = primary or get_session()
+        self.path = path
+        self.cell_limit = cell_limit
+        self._lock = threading.RLock()
+        self._sessions = {}  # spreadsheet id -> SheetsSession
+        self._state = self._load()
+
+    def sessions(self):
+        """Return the sessions of every shard, primary first"""
+        with self._lock:
+            self._register_primary()
+            return [self._session(shard) for shard in self._state["shards"]]
+
+    def session_for_chat(self, chat_key, chat_name):
+        """Return the session of the shard holding a chat's tab, assigning one if new"""
+        with self._lock:
+            self._register_primary()
+            spreadsheet_id = self._state["chats"].get(str(chat_key))
+            shard = self._shard(spreadsheet_id)
+            if shard is not None:
+                return self._session(shard)
+
+            # Chats from before sharding already have a tab somewhere
+            sessions = self.sessions()
+            for session in sessions:
+                if session.worksheets.get(chat_key, chat_name)[1] is not None:
+                    return self._assign(chat_key, session)
+
+            # New chat: least-loaded shard with room, or a new shard
+            usage = [(self.cell_usage(session), session) for session in sessions]
+            cells, session = min(usage, key=lambda item: item[0])
+            if cells >= self.cell_limit:
+                session = self._create_shard()
+            return self._assign(chat_key, session)
+
+    def archive_session(self, period):
+        """Return the session of the dated archive spreadsheet, creating it if needed"""
+        with self._lock:
+            archive = self._state["archives"].get(period)
+            if archive is None:
+                name = f"{self.primary.sheet_name} Archive {period}"
+                session = SheetsSession(sheet_name=name, state_file=None, parent=self.primary)
+                archive = {"id": session.spreadsheet.id, "name": name}
+                self._sessions[archive["id"]] = session
+                self._state["archives"][period] = archive
+                self._save()
+                print(f"🗄️ Using archive spreadsheet: {name}")
+            return self._session(archive)
+
+    def cell_usage(self, session):
+        """Grid cells allocated in a shard
+
+        Appends grow the grid without updating the cached worksheet metadata,
+        so the grid sizes are read fresh; the chat -> worksheet cache is left alone.
+        """
+        with metrics.timer("sheets_operation_seconds", operation="cell_usage"):
+            metadata = session.spreadsheet.fetch_sheet_metadata(
+                {"fields": "sheets.properties.gridProperties(rowCount,columnCount)"}
+            )
+        cells = sum(
+            grid.get("rowCount", 0) * grid.get("columnCount", 0)
+            for grid in (
+                sheet.get("properties", {}).get("gridProperties", {})
+                for sheet in metadata.get("sheets", [])
+            )
+        )
+        metrics.set_gauge("spreadsheet_cells", cells, spreadsheet=session.sheet_name)
+        return cells
+
+    def _register_primary(self):
+        primary_id = self.primary.spreadsheet.id
+        self._sessions.setdefault(primary_id, self.primary)
+        shards = self._state["shards"]
+        if not shards or shards[0]["id"] != primary_id:
+            shards[:] = [s for s in shards if s["id"] != primary_id]
+            shards.insert(0, {"id": primary_id, "name": self.primary.sheet_name})
+            self._save()
+
+    def _create_shard(self):
+        name = f"{self.primary.sheet_name} ({len(self._state['shards']) + 1})"
+        session = SheetsSession(sheet_name=name, state_file=None, parent=self.primary)
+        shard = {"id": session.spreadsheet.id, "name": name}
+        self._sessions[shard["id"]] = session
+        self._state["shards"].append(shard)
+        self._save()
+        print(f"📊 Added spreadsheet shard: {name}")
+        return session
+
+    def _assign(self, chat_key, session):
+        self._state["chats"][str(chat_key)] = session.spreadsheet.id
+        self._save()
+        return session
+
+    def _shard(self, spreadsheet_id):
+        for shard in self._state["shards"]:
+            if shard["id"] == spreadsheet_id:
+                return shard
+        return None
+
+    def _session(self, entry):
+        session = self._sessions.get(entry["id"])
+        if session is None:
+            session = SheetsSession(
+                sheet_name=entry["name"],
+                state_file=None,
+                spreadsheet_id=entry["id"],
+                parent=self.primary,
+            )
+            self._sessions[entry["id"]] = session
+        return session
+
+    def _load(self):
+        state = {"shards": [], "chats": {}, "archives": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return state
+
+        # Ignore a directory written for a different SHEET_NAME
+        if stored.get("sheet_name") != self.primary.sheet_name:
+            return state
+        for key in state:
+            state[key] = stored.get(key, state[key])
+        return state
+
+    def _save(self):
+        state = dict(self._state, sheet_name=self.primary.sheet_name)
+        tmp_file = f"{self.path}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.path)
+        except OSError as e:
+            print(f"❌ Failed to save shard directory: {e}")
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def set_shards(directory):
+    """Replace the process-wide shard directory"""
+    global _directory
+    with _directory_lock:
+        _directory = directory
+
+
+def get_shards():
+    """Return the process-wide shard directory"""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = ShardDirectory()
+    return _directory
@@ -0,0 +1,219 @@
+import os
+import time
+import threading
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread.utils import absolute_range_name
+from shards import get_shards
+from task_store import get_task_store
+from api_scheduler import get_scheduler, PRIORITY_BACKGROUND
+import metrics
+
+# Seconds between checks for edits made directly in the sheets (0 disables them)
+SHEET_SYNC_SECONDS = float(os.getenv("SHEET_SYNC_SECONDS", "60"))
+
+# Columns people edit by hand: Sub-Tasks / Notes and Status
+SYNCED_COLUMNS = ("D", "G")
+
+# Longest time a spreadsheet goes without a column read while the bot itself is
+# its last editor; a hand edit followed by a bot append is picked up by then
+SHEET_SYNC_MAX_STALE_SECONDS = float(os.getenv("SHEET_SYNC_MAX_STALE_SECONDS", "900"))
+
+
+class SheetSync:
+    """Pull edits made in the spreadsheets into the local task store
+
+    A full sync reads every tab. An incremental sync first asks Drive for each
+    spreadsheet's version and last editor. It skips spreadsheets that haven't
+    changed, and those whose last change was the bot's own write, since those
+    rows are already in the store. For the rest it reads only the task number,
+    Sub-Tasks and Status columns and writes just the rows that differ. Only
+    tabs whose rows were added or removed by hand are read in full.
+    """
+
+    def __init__(self, max_stale=SHEET_SYNC_MAX_STALE_SECONDS):
+        self._lock = threading.Lock()
+        self.max_stale = max_stale
+        self._versions = {}  # spreadsheet id -> Drive version at the last read
+        self._read_at = {}  # spreadsheet id -> monotonic time of the last column read
+        self.stats = {
+            "full_syncs": 0,
+            "version_checks": 0,
+            "unchanged": 0,
+            "own_writes": 0,
+            "column_reads": 0,
+            "tab_reloads": 0,
+            "rows_changed": 0,
+        }
+
+    def sync_all(self):
+        """Reconcile the store with every tab, one batchGet per spreadsheet"""
+        with self._lock, get_scheduler().priority(PRIORITY_BACKGROUND):
+            tabs = {}
+            versions = {}
+            for session in get_shards().sessions():
+                # Read the version first so edits made during the read are seen next time
+                versions[session.spreadsheet.id] = _drive_state(session)[0]
+                self._read_at[session.spreadsheet.id] = time.monotonic()
+                for title, rows in _read_tabs(session, session.worksheets.all()).items():
+                    tabs.setdefault(title, []).extend(rows)
+
+            store = get_task_store()
+            store.replace_all(tabs)
+            self._versions = versions
+            self.stats["full_syncs"] += 1
+            print(f"🗂️ Synced local task store: {store.count()} task(s) in {len(tabs)} tab(s)")
+
+    def sync_changes(self):
+        """Apply edits made since the last sync; returns the number of changed rows"""
+        with self._lock, get_scheduler().priority(PRIORITY_BACKGROUND):
+            changed = 0
+            for session in get_shards().sessions():
+                changed += self._sync_spreadsheet(session)
+            if changed:
+                print(f"🔄 Applied {changed} change(s) made in the sheets")
+            return changed
+
+    def _sync_spreadsheet(self, session):
+        spreadsheet_id = session.spreadsheet.id
+        version, by_bot = _drive_state(session)
+        self.stats["version_checks"] += 1
+        if version is not None and version == self._versions.get(spreadsheet_id):
+            self.stats["unchanged"] += 1
+            return 0
+
+        # Every append bumps the version; the bot's own rows are already stored
+        stale = time.monotonic() - self._read_at.get(spreadsheet_id, 0) >= self.max_stale
+        if version is not None and by_bot and not stale:
+            self._versions[spreadsheet_id] = version
+            self.stats["own_writes"] += 1
+            return 0
+
+        worksheets = session.worksheets.all()
+        if not worksheets:
+            self._versions[spreadsheet_id] = version
+            return 0
+
+        # One batchGet of the narrow columns of every tab
+        ranges = [
+            absolute_range_name(ws.title, f"{column}2:{column}")
+            for ws in worksheets
+            for column in ("A",) + SYNCED_COLUMNS
+        ]
+        with metrics.timer("sheets_operation_seconds", operation="sync_columns"):
+            response = session.spreadsheet.values_batch_get(
+                ranges, params={"majorDimension": "COLUMNS"}
+            )
+        self.stats["column_reads"] += 1
+        columns = [_column(value_range) for value_range in response.get("valueRanges", [])]
+        self._read_at[spreadsheet_id] = time.monotonic()
+
+        store = get_task_store()
+        changed = 0
+        reload = []
+        width = 1 + len(SYNCED_COLUMNS)
+        for index, ws in enumerate(worksheets):
+            numbers, *values = columns[index * width : (index + 1) * width]
+            known = store.snapshot(ws.title)
+
+            rows = {}
+            for position, number in enumerate(numbers):
+                if number.strip().isdigit():
+                    rows[int(number)] = tuple(
+                        column[position] if position < len(column) else ""
+                        for column in values
+                    )
+
+            if rows.keys() != known.keys():
+                # Rows were added or deleted by hand; only a full read is reliable
+                reload.append(ws)
+                continue
+
+            changes = [
+                (number, *fields) for number, fields in rows.items() if fields != known[number]
+            ]
+            if changes:
+                store.update_fields(ws.title, changes)
+                changed += len(changes)
+
+        if reload:
+            for title, rows in _read_tabs(session, reload).items():
+                store.replace_tab(title, rows)
+                self.stats["tab_reloads"] += 1
+                changed += 1
+
+        self._versions[spreadsheet_id] = version
+        self.stats["rows_changed"] += changed
+        metrics.inc("sheet_sync_changes_total", changed)
+        return changed
+
+
+def _drive_state(session):
+    """Drive's version of a spreadsheet and whether the bot made the last change
+
+    The version increases with every edit. Returns (None, False) if Drive
+    can't be reached.
+    """
+    try:
+        http = getattr(session.client, "http_client", session.client)
+        response = http.request(
+            "get",
+            f"{DRIVE_FILES_API_V3_URL}/{session.spreadsheet.id}",
+            params={"fields": "version,lastModifyingUser(me)", "supportsAllDrives": True},
+        )
+        data = response.json()
+        return data.get("version"), bool(data.get("lastModifyingUser", {}).get("me"))
+    except Exception as e:
+        # Without a version every sync reads the columns
+        print(f"❌ Failed to check spreadsheet version: {e}")
+        return None, False
+
+
+def _read_tabs(session, worksheets):
+    """Return {title: rows below the header} for worksheets with a single batchGet"""
+    if not worksheets:
+        return {}
+    ranges = [absolute_range_name(ws.title, "A:H") for ws in worksheets]
+    with metrics.timer("sheets_operation_seconds", operation="store_sync"):
+        response = session.spreadsheet.values_batch_get(ranges)
+    return {
+        ws.title: value_range.get("values", [])[1:]
+        for ws, value_range in zip(worksheets, response.get("valueRanges", []))
+    }
+
+
+def _column(value_range):
+    values = value_range.get("values", [])
+    return [str(value) for value in values[0]] if values else []
+
+
+_sync = None
+_sync_lock = threading.Lock()
+
+
+def get_sheet_sync():
+    """Return the process-wide sheet sync engine"""
+    global _sync
+    if _sync is None:
+        with _sync_lock:
+            if _sync is None:
+                _sync = SheetSync()
+    return _sync
+
+
+def sync_task_store():
+    """Fully reconcile the local task store with the sheets"""
+    try:
+        get_sheet_sync().sync_all()
+        return True
+    except Exception as e:
+        print(f"❌ Failed to sync local task store: {e}")
+        return False
+
+
+def sync_sheet_changes():
+    """Pull edits made directly in the sheets into the local task store"""
+    try:
+        return get_sheet_sync().sync_changes()
+    except Exception as e:
+        print(f"❌ Failed to sync sheet changes: {e}")
+        return 0
@@ -1,122 +1,67 @@
+import os
+import contextlib
 import gspread
-from gspread.exceptions import SpreadsheetNotFound, APIError
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name
 import datetime
-import re
-from oauth2client.service_account import ServiceAccountCredentials
-from config import (
-    SHEET_NAME,
-    CREDENTIALS_FILE,
-    GOOGLE_PROJECT_ID,
-    GOOGLE_PRIVATE_KEY_ID,
-    GOOGLE_PRIVATE_KEY,
-    GOOGLE_CLIENT_EMAIL,
-    GOOGLE_CLIENT_ID,
-)
+import threading
 from date_parser import extract_due_date
-
-# Define the scope
-SCOPE = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive",
-]
+from categorizer import get_task_category
+from sheets_session import get_session
+from shards import get_shards
+from task_store import get_task_store
+from api_scheduler import get_scheduler, PRIORITY_BACKGROUND
+import metrics
+
+# Cached task counters per worksheet: next task number and last used row.
+# Keyed by (spreadsheet id, sheet id); sheet ids are only unique within one spreadsheet.
+_task_counters = {}
+_worksheet_locks = {}
+_counters_lock = threading.RLock()
+
+# Shards are only rolled over once they use this many grid cells (0 disables archiving).
+# Google Sheets stops accepting rows at 10 million cells per spreadsheet.
+ARCHIVE_CELL_LIMIT = int(os.getenv("ARCHIVE_CELL_LIMIT", "8000000"))
+
+# Rows created this many days ago are moved to the archive (0 keeps them)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+
+# Rows with one of these statuses are moved to the archive
+ARCHIVE_STATUSES = {
+    status.strip().lower()
+    for status in os.getenv("ARCHIVE_STATUSES", "Done,Completed,Cancelled").split(",")
+    if status.strip()
+}
+
+# 0-indexed columns to center: #, Category, Owner, Due Date, Status, Created Date
+CENTER_COLUMNS = [0, 1, 4, 5, 6, 7]
+
+# Solid border around every task cell
+_ROW_BORDERS = {
+    side: {"style": "SOLID"} for side in ("top", "bottom", "left", "right")
+}
 
 
 def get_google_client():
-    """Create and return authenticated Google Sheets client"""
-    # Create credentials from environment variables
-
-    credentials_dict = {
-        "type": "service_account",
-        "project_id": GOOGLE_PROJECT_ID,
-        "private_key_id": GOOGLE_PRIVATE_KEY_ID,
-        "private_key": GOOGLE_PRIVATE_KEY.replace("\\n", "\n"),
-        "client_email": GOOGLE_CLIENT_EMAIL,
-        "client_id": GOOGLE_CLIENT_ID,
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_prover_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{GOOGLE_CLIENT_EMAIL.replace('@', '%40')}",
-    }
-
-    # Use from_json_keyfile_dict instead of from_json_keyfile_name
-    credentials = ServiceAccountCredentials.from_json_keyfile_dict(
-        credentials_dict,
-        [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive",
-        ],
-    )
-
-    client = gspread.authorize(credentials)
-    return client
+    """Return the cached, authenticated Google Sheets client"""
+    return get_session().client
 
 
 def get_or_create_spreadsheet():
     """Get the main spreadsheet or create it if it doesn't exist"""
-    client = get_google_client()
-
-    # Try to open existing spreadsheet
-    try:
-        spreadsheet = client.open(SHEET_NAME)
-        spreadsheet.share(None, perm_type="anyone", role="writer")
-
-        if "Sheet1" in spreadsheet.worksheets():
-            spreadsheet.del_worksheet(spreadsheet.worksheet("Sheet1"))
-
-        print(f"📊 Opened existing Google Sheet: {SHEET_NAME}")
-    except gspread.exceptions.SpreadsheetNotFound:
-        # Create new spreadsheet if not found
-        spreadsheet = client.create(SHEET_NAME)
-        print(f"📊 Created new Google Sheet: {SHEET_NAME}")
-
-        if "Sheet1" in spreadsheet.worksheets():
-            spreadsheet.del_worksheet(spreadsheet.worksheet("Sheet1"))
-
-        # Make the spreadsheet accessible to anyone with the link (view only)
-        spreadsheet.share(None, perm_type="anyone", role="writer")
-
-        print(f"📊 Created new Google Sheet: {SHEET_NAME}")
-        print(f"📊 Sheet URL: https://docs.google.com/spreadsheets/d/{spreadsheet.id}")
-
-        # Add this after creating the spreadsheet
-        try:
-            # Publish the sheet to the web
-            request = {
-                "published": True,
-                "publishAuto": True,
-                "publishedLinkType": "PUBLISHED_LINK_TYPE_PUBLIC",
-            }
-            client.sh.batch_update(
-                {
-                    "requests": [
-                        {
-                            "updateSpreadsheetProperties": {
-                                "properties": {"published": True},
-                                "fields": "published",
-                            }
-                        }
-                    ]
-                }
-            )
-            print(
-                f"📊 Published sheet URL: https://docs.google.com/spreadsheets/d/{spreadsheet.id}/pubhtml"
-            )
-        except Exception as e:
-            print(f"❌ Failed to publish sheet: {e}")
-
-    return spreadsheet
+    return get_session().spreadsheet
 
 
-def get_or_create_worksheet(spreadsheet, chat_name):
+def get_or_create_worksheet(spreadsheet, chat_name, chat_id=None, session=None):
     """Get existing worksheet for a chat or create a new one"""
-    # Sanitize worksheet name (Google Sheets has 100 char limit for tab names)
-    sheet_name = sanitize_sheet_name(chat_name)
+    cache = (session or get_session()).worksheets
+    chat_key = chat_id if chat_id is not None else chat_name
 
-    # Try to get existing worksheet
-    try:
-        worksheet = spreadsheet.worksheet(sheet_name)
-        print(f"📄 Using existing worksheet: {sheet_name}")
-    except gspread.exceptions.WorksheetNotFound:
+    # Resolve from the cached worksheet metadata (no API call once warm)
+    with metrics.timer("sheets_operation_seconds", operation="worksheet_lookup"):
+        sheet_name, worksheet = cache.get(chat_key, chat_name)
+
+    if worksheet is None:
         # Create new worksheet
         worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=8)
 
@@ -133,17 +78,33 @@ def get_or_create_worksheet(spreadsheet, chat_name):
         ]
         worksheet.append_row(headers)
 
-        # Format header row (bold, background color)
-        format_header_row(spreadsheet, worksheet)
+        with metrics.timer("sheets_operation_seconds", operation="format"):
+            # Format header row (bold, background color)
+            format_header_row(spreadsheet, worksheet)
+
+            # Set column widths
+            set_column_widths(spreadsheet, worksheet)
 
-        # Set column widths
-        set_column_widths(spreadsheet, worksheet)
+        # A new tab holds only the header row; no need to read it back
+        with _counters_lock:
+            _task_counters[_worksheet_key(worksheet)] = _counter_from_column(headers[:1])
 
+        cache.add(chat_key, chat_name, worksheet)
         print(f"📄 Created new worksheet: {sheet_name}")
 
     return worksheet
 
 
+def _is_missing_worksheet_error(error):
+    """Check whether an API error means the cached worksheet no longer exists"""
+    if isinstance(error, gspread.exceptions.WorksheetNotFound):
+        return True
+    if isinstance(error, APIError):
+        message = str(error)
+        return "Unable to parse range" in message or "No grid with id" in message
+    return False
+
+
 def format_header_row(spreadsheet, worksheet):
     """Apply formatting to the header row"""
     worksheet_id = worksheet.id
@@ -225,69 +186,120 @@ def set_column_widths(spreadsheet, worksheet):
     spreadsheet.batch_update({"requests": requests})
 
 
-def sanitize_sheet_name(name):
-    """Make sheet name compatible with Google Sheets"""
-    # Remove invalid characters
-    name = re.sub(r"[\\/*\[\]:]", "_", name)
+def get_next_task_number(worksheet):
+    """Get the next task number for the worksheet"""
+    with _counters_lock:
+        return _get_task_counter(worksheet)["next"]
 
-    # Limit to 100 characters (Google Sheets limit)
-    if len(name) > 100:
-        name = name[:100]
 
-    # Ensure not empty
-    if not name:
-        name = "Default"
+def _get_task_counter(worksheet):
+    counter = _task_counters.get(_worksheet_key(worksheet))
+    if counter is None:
+        counter = _seed_task_counter(worksheet)
+        _task_counters[_worksheet_key(worksheet)] = counter
+    return counter
 
-    return name
 
+def _seed_task_counter(worksheet):
+    """Seed the counter from a single read of the task number column"""
+    with metrics.timer("sheets_operation_seconds", operation="seed_counter"):
+        return _counter_from_column(worksheet.col_values(1))
 
-def get_next_task_number(worksheet):
-    """Get the next task number for the worksheet"""
-    values = worksheet.get_all_values()
-    if len(values) <= 1:  # Only header row exists
-        return 1
-    return len(values)  # Already 1-indexed because of header row
 
+def _counter_from_column(column):
+    """Build a task counter from the values of the task number column"""
+    numbers = [int(value) for value in column[1:] if str(value).strip().isdigit()]
+    return {
+        "next": max(numbers) + 1 if numbers else 1,
+        "last_row": max(len(column), 1),  # Header row is always present
+    }
 
-def append_task_to_sheet(task, from_user, full_message, chat_name, chat_id=None):
-    """Add a task to the Google Sheet worksheet for the specific chat"""
-    try:
-        # Get timestamp
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Extract due date or use default
-        due_date = extract_due_date(task)
-        if not due_date:
-            due_date = (datetime.datetime.now() + datetime.timedelta(days=7)).strftime(
-                "%Y-%m-%d"
+
+def _reserve_task_numbers(worksheet, count):
+    """Reserve task numbers for rows about to be appended"""
+    with _counters_lock:
+        counter = _get_task_counter(worksheet)
+        first_number = counter["next"]
+        counter["next"] += count
+        return first_number, counter["last_row"] + 1
+
+
+def _record_task_append(worksheet, expected_first_row, count, last_row):
+    """Update the cached counter from the range the append actually wrote"""
+    with _counters_lock:
+        counter = _task_counters.get(_worksheet_key(worksheet))
+        if counter is None:
+            return
+        expected_last_row = expected_first_row + count - 1
+        if last_row is None or last_row != expected_last_row:
+            # Someone inserted or deleted rows by hand; re-seed on next use
+            print(
+                f"🔢 Task rows moved in {worksheet.title} "
+                f"(expected row {expected_last_row}, got {last_row}), resyncing"
             )
+            _task_counters.pop(_worksheet_key(worksheet), None)
+        else:
+            counter["last_row"] = last_row
 
-        # Get category
-        category = _get_task_category(task)
-
-        # Get or create spreadsheet and worksheet
-        spreadsheet = get_or_create_spreadsheet()
-        worksheet = get_or_create_worksheet(spreadsheet, chat_name)
-
-        # Get next task number
-        task_number = get_next_task_number(worksheet)
-
-        # Add task row
-        worksheet.append_row(
-            [
-                task_number,
-                category,
-                task,
-                "",  # Sub-tasks
-                from_user,
-                due_date,
-                "New",
-                timestamp,
-            ]
+
+def _discard_task_counter(worksheet):
+    """Forget reserved numbers after a failed append so numbering stays gap-free"""
+    with _counters_lock:
+        _task_counters.pop(_worksheet_key(worksheet), None)
+
+
+class AmbiguousWriteError(Exception):
+    """An append failed in a way that doesn't tell whether the rows reached the sheet"""
+
+
+def build_task_row(task, from_user):
+    """Build the sheet row for a task; the task number is filled in on write"""
+    # Get timestamp
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Extract due date or use default
+    due_date = extract_due_date(task)
+    if not due_date:
+        due_date = (datetime.datetime.now() + datetime.timedelta(days=7)).strftime(
+            "%Y-%m-%d"
         )
 
-        # Format the task row
-        format_task_row(spreadsheet, worksheet, task_number)
+    # Get category
+    category = get_task_category(task)
+
+    return [
+        None,  # Task number
+        category,
+        task,
+        "",  # Sub-tasks
+        from_user,
+        due_date,
+        "New",
+        timestamp,
+    ]
+
+
+def append_task_rows(chat_name, chat_id, rows):
+    """Append prepared task rows for one chat and return their task numbers"""
+    # Get the spreadsheet shard holding this chat's tab
+    chat_key = chat_id if chat_id is not None else chat_name
+    session = get_shards().session_for_chat(chat_key, chat_name)
+
+    try:
+        return _write_task_rows(session, chat_name, chat_id, rows)
+    except Exception as e:
+        if not _is_missing_worksheet_error(e):
+            raise
+        # The tab was renamed or deleted by hand: forget it and retry once
+        print(f"📄 Worksheet for {chat_name} is gone, refreshing metadata")
+        session.worksheets.refresh()
+        return _write_task_rows(session, chat_name, chat_id, rows)
+
+
+def append_task_to_sheet(task, from_user, full_message, chat_name, chat_id=None):
+    """Add a task to the Google Sheet worksheet for the specific chat"""
+    try:
+        append_task_rows(chat_name, chat_id, [build_task_row(task, from_user)])
 
         print(
             f"✅ Task added to Google Sheet ({chat_name}): '{task[:30]}...' from {from_user}"
@@ -298,112 +310,204 @@ def append_task_to_sheet(task, from_user, full_message, chat_name, chat_id=None)
         return False
 
 
-def format_task_row(spreadsheet, worksheet, row_num):
-    """Format a task row with borders and center alignment for certain cells"""
-    worksheet_id = worksheet.id
+def _write_task_rows(session, chat_name, chat_id, rows):
+    """Append task rows with their formatting in a single batch_update"""
+    spreadsheet = session.spreadsheet
+    worksheet = get_or_create_worksheet(spreadsheet, chat_name, chat_id, session)
 
-    # Add borders to the row
-    border_request = {
-        "updateBorders": {
-            "range": {
-                "sheetId": worksheet_id,
-                "startRowIndex": row_num,
-                "endRowIndex": row_num + 1,
-                "startColumnIndex": 0,
-                "endColumnIndex": 8,
-            },
-            "top": {"style": "SOLID"},
-            "bottom": {"style": "SOLID"},
-            "left": {"style": "SOLID"},
-            "right": {"style": "SOLID"},
-            "innerVertical": {"style": "SOLID"},
-        }
-    }
+    with _worksheet_lock(worksheet):
+        # Get next task numbers from the cached counter
+        first_number, first_row = _reserve_task_numbers(worksheet, len(rows))
+        for offset, row in enumerate(rows):
+            row[0] = first_number + offset
 
-    # Center alignment for specific columns
-    center_columns = [
-        0,
-        1,
-        4,
-        5,
-        6,
-        7,
-    ]  # 0-indexed: #, Category, Owner, Due Date, Status, Created Date
-
-    center_requests = []
-    for col in center_columns:
-        center_requests.append(
-            {
-                "repeatCell": {
-                    "range": {
-                        "sheetId": worksheet_id,
-                        "startRowIndex": row_num,
-                        "endRowIndex": row_num + 1,
-                        "startColumnIndex": col,
-                        "endColumnIndex": col + 1,
-                    },
-                    "cell": {
-                        "userEnteredFormat": {
-                            "horizontalAlignment": "CENTER",
-                            "verticalAlignment": "MIDDLE",
-                        }
-                    },
-                    "fields": "userEnteredFormat(horizontalAlignment,verticalAlignment)",
+        body = {
+            "requests": [
+                {
+                    "appendCells": {
+                        "sheetId": worksheet.id,
+                        "rows": [_task_row_data(row) for row in rows],
+                        "fields": "userEnteredValue,userEnteredFormat(borders,horizontalAlignment,verticalAlignment)",
+                    }
                 }
-            }
-        )
+            ],
+            # Read back column A from the expected row to learn where the rows landed
+            "includeSpreadsheetInResponse": True,
+            "responseRanges": [
+                absolute_range_name(worksheet.title, f"A{first_row}:A")
+            ],
+            "responseIncludeGridData": True,
+        }
 
-    # Apply all formatting
-    requests = [border_request] + center_requests
-    spreadsheet.batch_update({"requests": requests})
+        try:
+            with metrics.timer("sheets_operation_seconds", operation="append"):
+                response = spreadsheet.batch_update(body)
+        except Exception as e:
+            _discard_task_counter(worksheet)
+            if _write_may_have_landed(e):
+                raise AmbiguousWriteError(str(e)) from e
+            raise
 
+        last_row = _last_row_from_response(response, worksheet.id, first_row)
+        _record_task_append(worksheet, first_row, len(rows), last_row)
 
-def _get_task_category(task):
-    """Determine the category of a task based on its content"""
-    task_lower = task.lower()
+    _update_task_store(worksheet.title, rows)
+    return [row[0] for row in rows]
 
-    if "meeting" in task_lower or "call" in task_lower:
-        return "Meeting"
-    elif "review" in task_lower or "check" in task_lower:
-        return "Review"
-    elif "report" in task_lower or "document" in task_lower:
-        return "Documentation"
-    elif "approval" in task_lower:
-        return "Approval"
-    else:
-        return "General"
 
+def _write_may_have_landed(error):
+    """False only for errors where Google rejected the request before applying it"""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if not isinstance(error, APIError) or status is None:
+        return True  # Timeouts and dropped connections
+    # 4xx requests are refused outright; 503 means the request wasn't processed
+    return not (400 <= status < 500 or status == 503)
 
-def get_spreadsheet_url():
-    """Get the URL of the spreadsheet for sharing"""
-    try:
-        client = get_google_client()
 
-        # Try to open the spreadsheet
-        try:
-            spreadsheet = client.open(SHEET_NAME)
-            print(f"📊 Opened existing Google Sheet: {SHEET_NAME}")
-        except SpreadsheetNotFound:
-            # Create a new spreadsheet if it doesn't exist
-            spreadsheet = client.create(SHEET_NAME)
+def find_written_rows(chat_name, chat_id, rows):
+    """Return the task number of each row already in the chat's tab, or None
+
+    Rows are matched on their task text and created time, which are fixed when
+    the message arrives, so a retry can tell whether an earlier append landed.
+    """
+    chat_key = chat_id if chat_id is not None else chat_name
+    session = get_shards().session_for_chat(chat_key, chat_name)
+    worksheet = get_or_create_worksheet(session.spreadsheet, chat_name, chat_id, session)
+
+    ranges = [absolute_range_name(worksheet.title, f"{column}2:{column}") for column in "ACH"]
+    with metrics.timer("sheets_operation_seconds", operation="verify_append"):
+        response = session.spreadsheet.values_batch_get(
+            ranges, params={"majorDimension": "COLUMNS"}
+        )
+    numbers, tasks, created = [
+        (value_range.get("values") or [[]])[0] for value_range in response.get("valueRanges", [])
+    ]
 
-            # Make the spreadsheet accessible to anyone with the link (view only)
-            spreadsheet.share(None, perm_type="anyone", role="reader")
+    written = {}
+    for index, number in enumerate(numbers):
+        if str(number).strip().isdigit() and index < len(tasks) and index < len(created):
+            written[(tasks[index], created[index])] = int(number)
+    return [written.get((row[2], row[7])) for row in rows]
 
-            print(f"📊 Created new Google Sheet: {SHEET_NAME}")
 
+def _update_task_store(title, rows):
+    """Mirror written rows into the local read model; the sheet stays the source of truth"""
+    try:
+        get_task_store().upsert(title, rows)
+    except Exception as e:
+        # The next reconcile picks the rows up
+        print(f"❌ Failed to update local task store: {e}")
+
+
+def _task_row_data(row):
+    """Build appendCells row data with values and formatting inline"""
+    cells = []
+    for col, value in enumerate(row):
+        fmt = {"borders": _ROW_BORDERS}
+        if col in CENTER_COLUMNS:
+            fmt["horizontalAlignment"] = "CENTER"
+            fmt["verticalAlignment"] = "MIDDLE"
+
+        cell = {"userEnteredFormat": fmt}
+        if isinstance(value, (int, float)):
+            cell["userEnteredValue"] = {"numberValue": value}
+        elif value:
+            cell["userEnteredValue"] = {"stringValue": str(value)}
+        cells.append(cell)
+    return {"values": cells}
+
+
+def _last_row_from_response(response, worksheet_id, first_row):
+    """Return the last data row from the column A window echoed by batch_update"""
+    sheets = (response or {}).get("updatedSpreadsheet", {}).get("sheets", [])
+    for sheet in sheets:
+        if sheet.get("properties", {}).get("sheetId") != worksheet_id:
+            continue
+        for grid in sheet.get("data", []):
+            row_data = grid.get("rowData", [])
+            if row_data:
+                return first_row + len(row_data) - 1
+    return None
+
+
+def _worksheet_key(worksheet):
+    return (worksheet.spreadsheet_id, worksheet.id)
+
+
+def _worksheet_lock(worksheet):
+    """Return the lock serializing appends to one worksheet"""
+    with _counters_lock:
+        return _worksheet_locks.setdefault(_worksheet_key(worksheet), threading.Lock())
+
+
+def _index_runs(indexes):
+    """Group row indexes into sorted (start, end) ranges of adjacent rows, end exclusive"""
+    runs = []
+    for index in sorted(indexes):
+        if runs and runs[-1][1] == index:
+            runs[-1][1] = index + 1
+        else:
+            runs.append([index, index + 1])
+    return [tuple(run) for run in runs]
+
+
+def get_spreadsheet_url(chat_id=None, chat_name=None):
+    """Get the URL of the spreadsheet for sharing (the chat's shard if given)"""
+    try:
+        if chat_id is not None or chat_name:
+            chat_key = chat_id if chat_id is not None else chat_name
+            spreadsheet = get_shards().session_for_chat(chat_key, chat_name).spreadsheet
+        else:
+            spreadsheet = get_or_create_spreadsheet()
         return f"https://docs.google.com/spreadsheets/d/{spreadsheet.id}"
     except Exception as e:
         print(f"❌ Failed to get spreadsheet URL: {e}")
         return None
 
 
+def get_spreadsheet_urls():
+    """Get (name, URL) of every spreadsheet shard"""
+    try:
+        return [
+            (session.sheet_name, f"https://docs.google.com/spreadsheets/d/{session.spreadsheet.id}")
+            for session in get_shards().sessions()
+        ]
+    except Exception as e:
+        print(f"❌ Failed to get spreadsheet URLs: {e}")
+        return []
+
+
+def get_session_stats():
+    """Return hit/miss counters of the cached Google session"""
+    session = get_session()
+    stats = dict(session.stats)
+    stats.update({f"worksheet_{k}": v for k, v in session.worksheets.stats.items()})
+    return stats
+
+
+def warm_up_sheets():
+    """Open the spreadsheets, index their worksheets and seed task counters before the first message"""
+    try:
+        sessions = get_shards().sessions()
+        loaded = 0
+        for session in sessions:
+            worksheets = session.worksheets.load()
+            # One batchGet per spreadsheet seeds every tab's task counter
+            _count_tasks(session.spreadsheet, worksheets)
+            loaded += len(worksheets)
+        print(f"📊 Loaded {loaded} worksheet(s) in {len(sessions)} spreadsheet(s)")
+    except Exception as e:
+        print(f"❌ Failed to warm up Google Sheets: {e}")
+
+
 def get_all_worksheets():
-    """Get all worksheet names in the spreadsheet"""
+    """Get all worksheet names across the spreadsheet shards"""
     try:
-        spreadsheet = get_or_create_spreadsheet()
-        worksheets = spreadsheet.worksheets()
-        return [ws.title for ws in worksheets]
+        return [
+            ws.title
+            for session in get_shards().sessions()
+            for ws in session.worksheets.all()
+        ]
     except Exception as e:
         print(f"❌ Failed to get worksheets: {e}")
         return []
@@ -412,20 +516,201 @@ def get_all_worksheets():
 def get_worksheet_summary(worksheet_name=None):
     """Get task count summary for all or specific worksheet"""
     try:
-        spreadsheet = get_or_create_spreadsheet()
+        # Summary reads yield to user-facing task writes
+        with get_scheduler().priority(PRIORITY_BACKGROUND):
+            return _get_worksheet_summary(worksheet_name)
+    except Exception as e:
+        print(f"❌ Failed to get worksheet summary: {e}")
+        return {} if worksheet_name is None else 0
+
 
+def _get_worksheet_summary(worksheet_name):
+    summary = {}
+    for session in get_shards().sessions():
         if worksheet_name:
-            # Get summary for specific worksheet
-            worksheet = spreadsheet.worksheet(worksheet_name)
-            values = worksheet.get_all_values()
-            return len(values) - 1 if len(values) > 0 else 0
+            # Get summary for specific worksheet from cached metadata
+            worksheets = [
+                ws for ws in session.worksheets.all() if ws.title == worksheet_name
+            ]
         else:
-            # Get summary for all worksheets
-            summary = {}
-            for ws in spreadsheet.worksheets():
-                values = ws.get_all_values()
-                summary[ws.title] = len(values) - 1 if len(values) > 0 else 0
-            return summary
+            # One metadata fetch, then one batchGet over column A of every tab
+            worksheets = session.worksheets.load()
+
+        for title, count in _count_tasks(session.spreadsheet, worksheets).items():
+            summary[title] = summary.get(title, 0) + count
+
+    if worksheet_name:
+        return summary.get(worksheet_name, 0)
+    return summary
+
+
+def _count_tasks(spreadsheet, worksheets):
+    """Count task rows of several worksheets with a single values.batchGet"""
+    if not worksheets:
+        return {}
+
+    with _counters_lock:
+        unseeded = {
+            _worksheet_key(ws): ws
+            for ws in worksheets
+            if _worksheet_key(ws) not in _task_counters
+        }
+
+    summary = {}
+    with contextlib.ExitStack() as locks:
+        # The column read seeds missing task counters for free. Hold those tabs'
+        # append locks across it so an append can't land (or drop the counter)
+        # between the read and the seed. Appends take one lock, so sorted order is safe.
+        for key in sorted(unseeded):
+            locks.enter_context(_worksheet_lock(unseeded[key]))
+
+        ranges = [absolute_range_name(ws.title, "A:A") for ws in worksheets]
+        with metrics.timer("sheets_operation_seconds", operation="count_rows"):
+            response = spreadsheet.values_batch_get(ranges)
+
+        for ws, value_range in zip(worksheets, response.get("valueRanges", [])):
+            column = [row[0] if row else "" for row in value_range.get("values", [])]
+            summary[ws.title] = len(column) - 1 if len(column) > 0 else 0
+
+            key = _worksheet_key(ws)
+            if key in unseeded:
+                with _counters_lock:
+                    _task_counters.setdefault(key, _counter_from_column(column))
+
+    return summary
+
+
+def archive_tasks(now=None):
+    """Move completed and old task rows of nearly full shards into dated archive spreadsheets"""
+    if ARCHIVE_CELL_LIMIT <= 0:
+        return 0
+
+    now = now or datetime.datetime.now()
+    cutoff = None
+    if ARCHIVE_AFTER_DAYS > 0:
+        cutoff = (now - datetime.timedelta(days=ARCHIVE_AFTER_DAYS)).strftime("%Y-%m-%d")
+
+    archived = 0
+    try:
+        # Rollover yields to user-facing task writes
+        with get_scheduler().priority(PRIORITY_BACKGROUND):
+            for session in get_shards().sessions():
+                archived += _archive_shard(session, cutoff, now)
     except Exception as e:
-        print(f"❌ Failed to get worksheet summary: {e}")
-        return {} if worksheet_name is None else 0
+        print(f"❌ Failed to archive tasks: {e}")
+
+    if archived:
+        print(f"🗄️ Archived {archived} task(s)")
+    return archived
+
+
+def _archive_shard(session, cutoff, now):
+    """Archive one shard once it nears the cell limit, reading every tab with one batchGet"""
+    # A metadata read is all a shard with room costs
+    if get_shards().cell_usage(session) < ARCHIVE_CELL_LIMIT:
+        return 0
+
+    worksheets = session.worksheets.all()
+    if not worksheets:
+        return 0
+
+    ranges = [absolute_range_name(ws.title, "A:H") for ws in worksheets]
+    with metrics.timer("sheets_operation_seconds", operation="archive_scan"):
+        response = session.spreadsheet.values_batch_get(ranges)
+
+    archived = 0
+    for ws, value_range in zip(worksheets, response.get("valueRanges", [])):
+        if not _archivable_rows(value_range.get("values", []), cutoff):
+            continue
+
+        try:
+            archived += _archive_worksheet(session, ws, cutoff, now)
+        except Exception as e:
+            print(f"❌ Failed to archive tasks of {ws.title}: {e}")
+
+    if archived:
+        # Grids shrank; titles and ids didn't, so the chat mappings stay valid
+        session.worksheets.load()
+    return archived
+
+
+def _archive_worksheet(session, worksheet, cutoff, now):
+    """Copy archivable rows of a tab to the archive, then delete them from the tab"""
+    with _worksheet_lock(worksheet):
+        # Re-read under the append lock so row positions can't shift underneath
+        values = worksheet.get_values("A:H")
+        indexes = _archivable_rows(values, cutoff)
+        if not indexes:
+            return 0
+
+        # Group by the year each task was created in
+        by_period = {}
+        for index in indexes:
+            row = (values[index] + [""] * 8)[:8]
+            period = row[7][:4] if row[7][:4].isdigit() else str(now.year)
+            if str(row[0]).strip().isdigit():
+                row[0] = int(row[0])
+            by_period.setdefault(period, []).append(row)
+
+        # Copy first: a failure after this point duplicates rows instead of losing them
+        for period, rows in sorted(by_period.items()):
+            archive = get_shards().archive_session(period)
+            archive_ws = get_or_create_worksheet(
+                archive.spreadsheet, worksheet.title, session=archive
+            )
+            archive.spreadsheet.batch_update(
+                {
+                    "requests": [
+                        {
+                            "appendCells": {
+                                "sheetId": archive_ws.id,
+                                "rows": [_task_row_data(row) for row in rows],
+                                "fields": "userEnteredValue,userEnteredFormat(borders,horizontalAlignment,verticalAlignment)",
+                            }
+                        }
+                    ]
+                }
+            )
+
+        # Delete bottom-up so earlier row indexes stay valid
+        delete_requests = [
+            {
+                "deleteDimension": {
+                    "range": {
+                        "sheetId": worksheet.id,
+                        "dimension": "ROWS",
+                        "startIndex": start,
+                        "endIndex": end,
+                    }
+                }
+            }
+            for start, end in reversed(_index_runs(indexes))
+        ]
+        with metrics.timer("sheets_operation_seconds", operation="archive_delete"):
+            session.spreadsheet.batch_update({"requests": delete_requests})
+
+        # Row positions changed; re-seed the counter on the next append
+        _discard_task_counter(worksheet)
+
+    try:
+        get_task_store().remove(
+            worksheet.title, [int(values[i][0]) for i in indexes if values[i][0].isdigit()]
+        )
+    except Exception as e:
+        print(f"❌ Failed to update local task store: {e}")
+
+    print(f"🗄️ Archived {len(indexes)} task(s) from {worksheet.title}")
+    return len(indexes)
+
+
+def _archivable_rows(values, cutoff):
+    """Return 0-based indexes of rows that are completed or older than the cutoff"""
+    indexes = []
+    # The newest row always stays so max(#) + 1 numbering continues after a rollover
+    for index in range(1, len(values) - 1):
+        row = values[index]
+        status = row[6].strip().lower() if len(row) > 6 else ""
+        created = row[7][:10] if len(row) > 7 else ""
+        if status in ARCHIVE_STATUSES or (cutoff and created and created < cutoff):
+            indexes.append(index)
+    return indexes
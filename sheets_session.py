@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import datetime
+import threading
+import gspread
+from gspread.exceptions import SpreadsheetNotFound, APIError
+from api_scheduler import get_scheduler
+import metrics
+from config import (
+    SHEET_NAME,
+    GOOGLE_PROJECT_ID,
+    GOOGLE_PRIVATE_KEY_ID,
+    GOOGLE_PRIVATE_KEY,
+    GOOGLE_CLIENT_EMAIL,
+    GOOGLE_CLIENT_ID,
+)
+
+# Define the scope
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# Local file remembering the spreadsheet ID so restarts can use open_by_key
+SHEET_STATE_FILE = os.getenv("SHEET_STATE_FILE", ".sheet_state.json")
+
+# Characters Google Sheets doesn't allow in tab names
+_INVALID_TITLE_CHARS = re.compile(r"[\\/*\[\]:]")
+
+# Refresh the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+
+
+def build_credentials():
+    """Create service account credentials from environment variables"""
+    # Only needed once per process, so keep it off the import path
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    credentials_dict = {
+        "type": "service_account",
+        "project_id": GOOGLE_PROJECT_ID,
+        "private_key_id": GOOGLE_PRIVATE_KEY_ID,
+        "private_key": GOOGLE_PRIVATE_KEY.replace("\\n", "\n"),
+        "client_email": GOOGLE_CLIENT_EMAIL,
+        "client_id": GOOGLE_CLIENT_ID,
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_prover_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{GOOGLE_CLIENT_EMAIL.replace('@', '%40')}",
+    }
+
+    return ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, SCOPE)
+
+
+def _authorize():
+    return gspread.authorize(build_credentials())
+
+
+class SheetsSession:
+    """Long-lived Google Sheets session that authorizes once and caches the spreadsheet"""
+
+    def __init__(
+        self,
+        sheet_name=SHEET_NAME,
+        state_file=SHEET_STATE_FILE,
+        client_factory=None,
+        spreadsheet_id=None,
+        parent=None,
+    ):
+        self.sheet_name = sheet_name
+        self.state_file = state_file
+        self.client_factory = client_factory or _authorize
+        # Shard and archive sessions reuse the parent's client and know their ID up front
+        self.parent = parent
+        self._spreadsheet_id = spreadsheet_id
+        self._lock = threading.RLock()
+        self._client = None
+        self._spreadsheet = None
+        self.worksheets = WorksheetCache(self)
+        self.stats = {
+            "client_hits": 0,
+            "client_misses": 0,
+            "token_refreshes": 0,
+            "spreadsheet_hits": 0,
+            "spreadsheet_misses": 0,
+            "open_by_key": 0,
+            "open_by_name": 0,
+            "created": 0,
+        }
+
+    @property
+    def client(self):
+        """Return the authorized gspread client, refreshing the token if needed"""
+        if self.parent is not None:
+            return self.parent.client
+
+        with self._lock:
+            if self._client is None:
+                self.stats["client_misses"] += 1
+                # All Sheets/Drive requests go through the quota scheduler
+                with metrics.timer("sheets_operation_seconds", operation="auth"):
+                    self._client = get_scheduler().install(self.client_factory())
+                self._install_token_refresh(self._client)
+                print("🔑 Authorized Google client")
+            else:
+                self.stats["client_hits"] += 1
+            return self._client
+
+    def _install_token_refresh(self, client):
+        """Check the token before every request, including those of cached objects"""
+        # gspread 6 moved request() and the credentials to client.http_client
+        http = getattr(client, "http_client", client)
+        scheduled_request = http.request
+
+        def request(*args, **kwargs):
+            self._refresh_token_if_needed(http)
+            return scheduled_request(*args, **kwargs)
+
+        http.request = request
+
+    def _refresh_token_if_needed(self, http):
+        """Refresh the access token shortly before it expires"""
+        # gspread converts oauth2client credentials to google-auth ones, which
+        # keep a naive UTC expiry; it stays None until the first token is fetched
+        auth = getattr(http, "auth", None)
+        expiry = getattr(auth, "expiry", None)
+        if expiry is None or not hasattr(auth, "refresh"):
+            return
+        if (expiry - _utcnow_naive()).total_seconds() > TOKEN_REFRESH_MARGIN:
+            return
+
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if (auth.expiry - _utcnow_naive()).total_seconds() > TOKEN_REFRESH_MARGIN:
+                return
+            try:
+                from google.auth.transport.requests import Request
+
+                auth.refresh(Request())
+                self.stats["token_refreshes"] += 1
+            except Exception as e:
+                # The authorized session will still refresh on a 401
+                print(f"❌ Failed to refresh Google token: {e}")
+
+    @property
+    def spreadsheet(self):
+        """Return the cached spreadsheet, opening or creating it on first use"""
+        with self._lock:
+            if self._spreadsheet is not None:
+                self.stats["spreadsheet_hits"] += 1
+                return self._spreadsheet
+
+            self.stats["spreadsheet_misses"] += 1
+            with metrics.timer("sheets_operation_seconds", operation="open"):
+                self._spreadsheet = self._open_spreadsheet()
+            return self._spreadsheet
+
+    @property
+    def spreadsheet_id(self):
+        return self.spreadsheet.id
+
+    def invalidate(self):
+        """Forget the cached spreadsheet so the next access reopens it"""
+        with self._lock:
+            self._spreadsheet = None
+            self.worksheets.clear()
+
+    def _open_spreadsheet(self):
+        client = self.client
+
+        # Fast path: open the remembered spreadsheet by key
+        spreadsheet_id = self._load_spreadsheet_id()
+        if spreadsheet_id:
+            try:
+                spreadsheet = client.open_by_key(spreadsheet_id)
+                self.stats["open_by_key"] += 1
+                print(f"📊 Opened Google Sheet by key: {self.sheet_name}")
+                return spreadsheet
+            except (SpreadsheetNotFound, APIError) as e:
+                print(f"❌ Stored spreadsheet ID is no longer valid: {e}")
+
+        # Slow path: Drive name lookup, then remember the ID
+        try:
+            spreadsheet = client.open(self.sheet_name)
+            self.stats["open_by_name"] += 1
+            print(f"📊 Opened existing Google Sheet: {self.sheet_name}")
+        except SpreadsheetNotFound:
+            spreadsheet = self._create_spreadsheet(client)
+
+        self._save_spreadsheet_id(spreadsheet.id)
+        return spreadsheet
+
+    def _create_spreadsheet(self, client):
+        """Create the spreadsheet and run the one-time share/publish setup"""
+        spreadsheet = client.create(self.sheet_name)
+        self.stats["created"] += 1
+
+        # Make the spreadsheet accessible to anyone with the link
+        spreadsheet.share(None, perm_type="anyone", role="writer")
+
+        print(f"📊 Created new Google Sheet: {self.sheet_name}")
+        print(f"📊 Sheet URL: https://docs.google.com/spreadsheets/d/{spreadsheet.id}")
+
+        try:
+            # Publish the sheet to the web
+            spreadsheet.batch_update(
+                {
+                    "requests": [
+                        {
+                            "updateSpreadsheetProperties": {
+                                "properties": {"published": True},
+                                "fields": "published",
+                            }
+                        }
+                    ]
+                }
+            )
+            print(
+                f"📊 Published sheet URL: https://docs.google.com/spreadsheets/d/{spreadsheet.id}/pubhtml"
+            )
+        except Exception as e:
+            print(f"❌ Failed to publish sheet: {e}")
+
+        return spreadsheet
+
+    def _load_spreadsheet_id(self):
+        if self._spreadsheet_id or not self.state_file:
+            return self._spreadsheet_id
+
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Ignore IDs remembered for a different SHEET_NAME
+        if state.get("sheet_name") != self.sheet_name:
+            return None
+        return state.get("spreadsheet_id")
+
+    def _save_spreadsheet_id(self, spreadsheet_id):
+        self._spreadsheet_id = spreadsheet_id
+        if not self.state_file:
+            return
+
+        state = {"sheet_name": self.sheet_name, "spreadsheet_id": spreadsheet_id}
+        tmp_file = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            print(f"❌ Failed to save spreadsheet ID: {e}")
+
+
+class WorksheetCache:
+    """In-memory map from chat to worksheet handle, filled from one metadata fetch"""
+
+    def __init__(self, session):
+        self.session = session
+        self._lock = threading.RLock()
+        self._by_title = None
+        self._by_chat = {}
+        self.stats = {"hits": 0, "misses": 0, "metadata_fetches": 0}
+
+    def load(self):
+        """Index every worksheet of the spreadsheet with a single metadata fetch"""
+        with self._lock, metrics.timer(
+            "sheets_operation_seconds", operation="worksheet_metadata"
+        ):
+            worksheets = self.session.spreadsheet.worksheets()
+            self.stats["metadata_fetches"] += 1
+            self._by_title = {ws.title: ws for ws in worksheets}
+            return list(worksheets)
+
+    def refresh(self):
+        """Drop all chat mappings and re-read worksheet metadata"""
+        with self._lock:
+            self._by_chat.clear()
+            return self.load()
+
+    def clear(self):
+        with self._lock:
+            self._by_title = None
+            self._by_chat.clear()
+
+    def all(self):
+        """Return all known worksheets, fetching metadata only if not loaded yet"""
+        with self._lock:
+            if self._by_title is None:
+                self.load()
+            return list(self._by_title.values())
+
+    def get(self, chat_key, chat_name):
+        """Return (title, worksheet) for a chat; worksheet is None if the tab doesn't exist"""
+        with self._lock:
+            entry = self._by_chat.get(chat_key)
+            if entry is not None and entry[0] == chat_name:
+                self.stats["hits"] += 1
+                return entry[1], entry[2]
+
+            self.stats["misses"] += 1
+            if self._by_title is None:
+                self.load()
+
+            title = sanitize_title(chat_name)
+            worksheet = self._by_title.get(title)
+            if worksheet is not None:
+                self._by_chat[chat_key] = (chat_name, title, worksheet)
+            return title, worksheet
+
+    def add(self, chat_key, chat_name, worksheet):
+        """Remember a newly created worksheet"""
+        with self._lock:
+            if self._by_title is not None:
+                self._by_title[worksheet.title] = worksheet
+            self._by_chat[chat_key] = (chat_name, worksheet.title, worksheet)
+
+    def invalidate(self, chat_key):
+        """Forget a chat's worksheet after it was renamed or deleted"""
+        with self._lock:
+            entry = self._by_chat.pop(chat_key, None)
+            if entry is not None and self._by_title is not None:
+                self._by_title.pop(entry[1], None)
+
+
+def sanitize_title(name):
+    """Make sheet name compatible with Google Sheets"""
+    # Remove invalid characters
+    name = _INVALID_TITLE_CHARS.sub("_", name)
+
+    # Limit to 100 characters (Google Sheets limit)
+    if len(name) > 100:
+        name = name[:100]
+
+    # Ensure not empty
+    if not name:
+        name = "Default"
+
+    return name
+
+
+def _utcnow_naive():
+    # google-auth stores expiry as a naive UTC datetime
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def set_session(session):
+    """Replace the process-wide Sheets session (e.g. with one using a fake backend)"""
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def get_session():
+    """Return the process-wide Sheets session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = SheetsSession()
+    return _session
@@ -0,0 +1,193 @@
+import os
+import time
+import asyncio
+from telegram.error import BadRequest, RetryAfter
+import metrics
+
+# Seconds between sends/edits of status messages in one chat. Telegram allows
+# about one message a second in a private chat and 20 a minute in a group.
+STATUS_EDIT_INTERVAL = float(os.getenv("STATUS_EDIT_INTERVAL", "1"))
+STATUS_GROUP_EDIT_INTERVAL = float(os.getenv("STATUS_GROUP_EDIT_INTERVAL", "3"))
+
+# Task numbers listed in a status message before it just gives the count
+STATUS_MAX_NUMBERS = 20
+
+
+class _Status:
+    """One status message and the writes it reports on"""
+
+    def __init__(self, message, interval):
+        self.chat_id = message.chat.id
+        self.reply_to = message
+        self.interval = interval
+        self.message = None  # The bot's reply, once sent
+        self.sending = True
+        self.sent_text = None
+        self.expected = 0
+        self.pending = 0
+        self.skipped = 0
+        self.numbers = []
+        self.unsynced = 0
+        self.edit_task = None
+
+    def render(self, journaled):
+        skipped = f" (skipped {self.skipped} sent recently)" if self.skipped else ""
+        if self.pending:
+            return f"⏳ Recording {self.expected} task(s)…{skipped}"
+
+        lines = []
+        if self.numbers:
+            lines.append(
+                f"✅ Added {len(self.numbers)} task(s) to the list: "
+                f"{format_numbers(self.numbers)}{skipped}"
+            )
+            skipped = ""
+        if self.unsynced and journaled:
+            lines.append(
+                f"⏳ Saved {self.unsynced} task(s); they will be added to the sheet "
+                f"once Google Sheets is reachable.{skipped}"
+            )
+        elif self.unsynced:
+            lines.append(f"❌ Failed to add {self.unsynced} task(s). Please try again later.")
+        return "\n".join(lines)
+
+
+class StatusReplies:
+    """Acknowledge task messages at once and edit the reply when the write lands
+
+    The first task message of a burst gets a "⏳ Recording…" reply. Messages
+    that arrive while its writes are still in flight join it instead of
+    getting replies of their own. When the writes finish, the reply is edited
+    to the result. Edits in a chat are spaced by the edit interval, and each
+    one sends the latest text, so a burst of results costs a single edit.
+    """
+
+    def __init__(
+        self,
+        journaled=True,
+        edit_interval=STATUS_EDIT_INTERVAL,
+        group_edit_interval=STATUS_GROUP_EDIT_INTERVAL,
+    ):
+        # Failed writes are retried from the outbox when journaled
+        self.journaled = journaled
+        self.edit_interval = edit_interval
+        self.group_edit_interval = group_edit_interval
+        self._open = {}  # chat id -> status still waiting for writes
+        self._last_sent = {}  # chat id -> monotonic time of the last send or edit
+        self._tasks = set()
+        self.stats = {"replies": 0, "joined": 0, "edits": 0, "coalesced": 0}
+
+    async def track(self, message, future, count, skipped=0):
+        """Report on a queued write of count tasks; returns once the ack is sent"""
+        status = self._open.get(message.chat.id)
+        joined = status is not None
+        if not joined:
+            interval = (
+                self.edit_interval if message.chat.type == "private" else self.group_edit_interval
+            )
+            status = self._open[message.chat.id] = _Status(message, interval)
+
+        status.expected += count
+        status.pending += 1
+        status.skipped += skipped
+        future.add_done_callback(lambda f: self._finish(status, f, count))
+
+        if joined:
+            self.stats["joined"] += 1
+            self._schedule(status)
+            return
+
+        # Only this reply is awaited: one Telegram round trip
+        text = status.render(self.journaled)
+        try:
+            status.message = await message.reply_text(text)
+            status.sent_text = text
+            self.stats["replies"] += 1
+        except Exception as e:
+            print(f"❌ Failed to acknowledge tasks: {e}")
+        self._last_sent[status.chat_id] = time.monotonic()
+        status.sending = False
+        # The write may have finished while the reply was on its way
+        self._schedule(status)
+
+    def _finish(self, status, future, count):
+        status.pending -= 1
+        if future.cancelled() or future.exception() is not None:
+            status.unsynced += count
+        else:
+            status.numbers.extend(future.result())
+
+        if not status.pending and self._open.get(status.chat_id) is status:
+            # The next message starts a new status reply
+            del self._open[status.chat_id]
+        self._schedule(status)
+
+    def _schedule(self, status):
+        if status.sending:
+            return
+        if status.edit_task is not None and not status.edit_task.done():
+            # The running edit loop picks up the latest text
+            self.stats["coalesced"] += 1
+            return
+        status.edit_task = asyncio.get_running_loop().create_task(self._edit(status))
+        self._tasks.add(status.edit_task)
+        status.edit_task.add_done_callback(self._tasks.discard)
+
+    async def _edit(self, status):
+        while True:
+            text = status.render(self.journaled)
+            if text == status.sent_text:
+                return
+
+            # Wait out the chat's interval, then send whatever is latest by then
+            wait = self._last_sent.get(status.chat_id, 0) + status.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            self._last_sent[status.chat_id] = time.monotonic()
+            try:
+                if status.message is not None:
+                    await status.message.edit_text(text)
+                else:
+                    # The acknowledgement never went out; reply with the result instead
+                    status.message = await status.reply_to.reply_text(text)
+                status.sent_text = text
+                self.stats["edits"] += 1
+                metrics.inc("status_edits_total")
+            except RetryAfter as e:
+                await asyncio.sleep(_seconds(e.retry_after))
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    print(f"❌ Failed to update task status message: {e}")
+                    return
+                status.sent_text = text
+            except Exception as e:
+                print(f"❌ Failed to update task status message: {e}")
+                return
+
+    async def stop(self):
+        """Send the final edits still waiting for the rate limit"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+def format_numbers(numbers):
+    """Render task numbers compactly, e.g. #12–14, #20"""
+    numbers = sorted(n for n in numbers if n is not None)
+    if len(numbers) > STATUS_MAX_NUMBERS:
+        return f"#{numbers[0]}–{numbers[-1]}"
+
+    ranges = []
+    for number in numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ", ".join(
+        f"#{start}" if start == end else f"#{start}–{end}" for start, end in ranges
+    )
+
+
+def _seconds(retry_after):
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after
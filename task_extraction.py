@@ -2,17 +2,28 @@ import re
 
 
 def extract_tasks_from_message(message):
-    """Extract tasks from a message by checking if it starts with #"""
-    # Check if the message starts with #
-    message_text = message.strip()
+    """Extract tasks from a message: every line starting with # is a task"""
+    return list(iter_tasks(message))
 
-    if message_text.startswith("#"):
-        # Remove just the # from the beginning of the message
-        task = message_text[1:].strip()
-        if task:  # Make sure there's actual content after the #
-            return [task]
 
-    return []
+def iter_tasks(message):
+    """Scan a message line by line and yield the text of each # line"""
+    start = 0
+    length = len(message)
+
+    while start < length:
+        end = message.find("\n", start)
+        if end == -1:
+            end = length
+
+        line = message[start:end].strip()
+        if line.startswith("#"):
+            # Remove just the # from the beginning of the line
+            task = line[1:].strip()
+            if task:  # Make sure there's actual content after the #
+                yield task
+
+        start = end + 1
 
 
 def is_valid_task(text):
@@ -0,0 +1,45 @@
+# Column layout shared by the sheets, the Excel backend and exports
+
+HEADERS = [
+    "#",
+    "Category",
+    "Task / Description",
+    "Sub-Tasks / Notes",
+    "Owner",
+    "Due Date",
+    "Status",
+    "Created Date",
+]
+
+COLUMN_WIDTHS = {
+    "A": 5,
+    "B": 15,
+    "C": 40,
+    "D": 30,
+    "E": 15,
+    "F": 15,
+    "G": 12,
+    "H": 15,
+}
+
+
+def style_header_cell(cell):
+    """Bold, shaded, centered and bordered header cell of an openpyxl workbook"""
+    # Only workbooks need openpyxl; keep it off the import path of CSV exports
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    cell.font = Font(bold=True)
+    cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+    cell.alignment = Alignment(horizontal="center", vertical="center")
+    cell.border = thin_border()
+
+
+def thin_border():
+    from openpyxl.styles import Border, Side
+
+    return Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin"),
+    )
@@ -0,0 +1,272 @@
+import os
+import json
+import sqlite3
+import threading
+
+# Local read model of every task row, answering queries without the Sheets API
+TASK_STORE_FILE = os.getenv("TASK_STORE_FILE", "tasks.sqlite3")
+
+# Columns of a sheet row, in order
+COLUMNS = (
+    "task_number",
+    "category",
+    "task",
+    "subtasks",
+    "owner",
+    "due_date",
+    "status",
+    "created_at",
+)
+
+
+class TaskStore:
+    """SQLite (WAL) mirror of the task rows of all worksheets, with full-text search"""
+
+    def __init__(self, path=TASK_STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                tab TEXT NOT NULL,
+                task_number INTEGER NOT NULL,
+                category TEXT NOT NULL DEFAULT '',
+                task TEXT NOT NULL DEFAULT '',
+                subtasks TEXT NOT NULL DEFAULT '',
+                owner TEXT NOT NULL DEFAULT '',
+                due_date TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL DEFAULT '',
+                created_at TEXT NOT NULL DEFAULT '',
+                UNIQUE (tab, task_number)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+            CREATE INDEX IF NOT EXISTS tasks_owner ON tasks (owner COLLATE NOCASE);
+            """
+        )
+        self.full_text = self._create_fts()
+        self._conn.commit()
+
+    def _create_fts(self):
+        """Set up the FTS5 index kept in step by triggers; False if SQLite lacks FTS5"""
+        try:
+            self._conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                    task, subtasks, content='tasks', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+                    INSERT INTO tasks_fts (rowid, task, subtasks)
+                    VALUES (new.id, new.task, new.subtasks);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+                    INSERT INTO tasks_fts (tasks_fts, rowid, task, subtasks)
+                    VALUES ('delete', old.id, old.task, old.subtasks);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE ON tasks BEGIN
+                    INSERT INTO tasks_fts (tasks_fts, rowid, task, subtasks)
+                    VALUES ('delete', old.id, old.task, old.subtasks);
+                    INSERT INTO tasks_fts (rowid, task, subtasks)
+                    VALUES (new.id, new.task, new.subtasks);
+                END;
+                """
+            )
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"❌ SQLite has no FTS5, /search falls back to substring matching: {e}")
+            return False
+
+    def upsert(self, tab, rows):
+        """Insert or update sheet rows of one tab (rows without a task number are skipped)"""
+        records = [_record(tab, row) for row in rows]
+        with self._lock, self._conn:
+            self._upsert(record for record in records if record is not None)
+
+    def replace_tab(self, tab, rows):
+        """Make the stored rows of one tab exactly match the given sheet rows"""
+        self.replace_all({tab: rows}, prune_tabs=False)
+
+    def replace_all(self, tabs, prune_tabs=True):
+        """Reconcile with a full read of {tab: rows}; tabs not listed are dropped"""
+        with self._lock, self._conn:
+            for tab, rows in tabs.items():
+                records = [r for r in (_record(tab, row) for row in rows) if r is not None]
+                numbers = [record[1] for record in records]
+                self._conn.execute(
+                    "DELETE FROM tasks WHERE tab = ? AND task_number NOT IN "
+                    "(SELECT value FROM json_each(?))",
+                    (tab, _json_list(numbers)),
+                )
+                self._upsert(records)
+
+            if prune_tabs:
+                self._conn.execute(
+                    "DELETE FROM tasks WHERE tab NOT IN (SELECT value FROM json_each(?))",
+                    (_json_list(list(tabs)),),
+                )
+
+    def remove(self, tab, task_numbers):
+        """Drop rows that left the live sheet, e.g. after archiving"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM tasks WHERE tab = ? AND task_number = ?",
+                [(tab, number) for number in task_numbers],
+            )
+
+    def lookup(self, tab, task_numbers):
+        """Return {task number: task} for the given tasks of one tab"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT tab, " + ", ".join(COLUMNS) + " FROM tasks WHERE tab = ? "
+                "AND task_number IN (SELECT value FROM json_each(?))",
+                (tab, _json_list(list(task_numbers))),
+            )
+            return {row["task_number"]: dict(row) for row in cursor}
+
+    def snapshot(self, tab):
+        """Return {task number: (subtasks, status)} for one tab"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT task_number, subtasks, status FROM tasks WHERE tab = ?", (tab,)
+            )
+            return {number: (subtasks, status) for number, subtasks, status in cursor}
+
+    def update_fields(self, tab, changes):
+        """Apply (task number, subtasks, status) edits made in the sheet"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE tasks SET subtasks = ?, status = ? WHERE tab = ? AND task_number = ?",
+                [(subtasks, status, tab, number) for number, subtasks, status in changes],
+            )
+
+    def _upsert(self, records):
+        # Only rewrite rows that changed, so unchanged rows don't churn the FTS index
+        self._conn.executemany(
+            "INSERT INTO tasks (tab, task_number, category, task, subtasks, owner, "
+            "due_date, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (tab, task_number) DO UPDATE SET "
+            "category = excluded.category, task = excluded.task, "
+            "subtasks = excluded.subtasks, owner = excluded.owner, "
+            "due_date = excluded.due_date, status = excluded.status, "
+            "created_at = excluded.created_at "
+            "WHERE (category, task, subtasks, owner, due_date, status, created_at) IS NOT "
+            "(excluded.category, excluded.task, excluded.subtasks, excluded.owner, "
+            "excluded.due_date, excluded.status, excluded.created_at)",
+            records,
+        )
+
+    def tasks(self, tab=None, status=None, exclude_statuses=(), limit=50):
+        """Return tasks of a tab (or all tabs), optionally filtered by status"""
+        where, params = _scope(tab)
+        if status:
+            where.append("status = ? COLLATE NOCASE")
+            params.append(status)
+        if exclude_statuses:
+            where.append("lower(status) NOT IN (SELECT value FROM json_each(?))")
+            params.append(_json_list(sorted(s.lower() for s in exclude_statuses)))
+        return self._select(where, params, "tab, task_number", limit)
+
+    def due(self, start, end=None, tab=None, exclude_statuses=(), limit=50):
+        """Return tasks due between start and end (ISO dates, inclusive)"""
+        where, params = _scope(tab)
+        where.append("due_date BETWEEN ? AND ?")
+        params.extend([start or "0000-00-00", end or start])
+        if exclude_statuses:
+            where.append("lower(status) NOT IN (SELECT value FROM json_each(?))")
+            params.append(_json_list(sorted(s.lower() for s in exclude_statuses)))
+        return self._select(where, params, "due_date, tab, task_number", limit)
+
+    def search(self, text, tab=None, limit=20):
+        """Full-text search over task descriptions and sub-task notes"""
+        terms = text.split()
+        if not terms:
+            return []
+
+        where, params = _scope(tab)
+        if self.full_text:
+            # Quote every word so user input can't inject FTS5 syntax; prefix-match each
+            query = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+            where.append("id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+            params.append(query)
+        else:
+            for term in terms:
+                where.append("(task LIKE ? OR subtasks LIKE ?)")
+                params.extend([f"%{term}%", f"%{term}%"])
+        return self._select(where, params, "tab, task_number DESC", limit)
+
+    def rows(self, tab=None):
+        """Return (tab, task_number, ...) tuples of every task, in COLUMNS order"""
+        where, params = _scope(tab)
+        sql = "SELECT tab, " + ", ".join(COLUMNS) + " FROM tasks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(sql, params)]
+
+    @property
+    def generation(self):
+        """Number of row changes so far; it moves whenever any task is written or synced"""
+        with self._lock:
+            return self._conn.total_changes
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def _select(self, where, params, order, limit):
+        sql = "SELECT tab, " + ", ".join(COLUMNS) + " FROM tasks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, (*params, limit))]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _record(tab, row):
+    """Convert a sheet row to a (tab, number, ...) tuple, or None if it isn't a task"""
+    number = str(row[0]).strip() if row else ""
+    if not number.isdigit():
+        return None
+    values = [("" if value is None else str(value)) for value in row[1:8]]
+    values += [""] * (7 - len(values))
+    return (tab, int(number), *values)
+
+
+def _scope(tab):
+    if tab is None:
+        return [], []
+    return ["tab = ?"], [tab]
+
+
+def _json_list(values):
+    return json.dumps(values)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def set_task_store(store):
+    """Replace the process-wide task store"""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def get_task_store():
+    """Return the process-wide task store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TaskStore()
+    return _store
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pytest
+
+
+@pytest.fixture
+def fake_backend():
+    """Point sheets_manager at a fresh fake Sheets backend, restoring the real setup afterwards
+
+    Needs gspread and the user-supplied config.py; tests using it are skipped without them.
+    """
+    pytest.importorskip("gspread")
+    pytest.importorskip("config")
+
+    import api_scheduler
+    import shards
+    import sheets_manager
+    import sheets_session
+    import task_store
+    from benchmarks.fake_sheets import FakeSheetsBackend
+
+    saved = {
+        "session": sheets_session._session,
+        "shards": shards._directory,
+        "store": task_store._store,
+        "scheduler": api_scheduler._scheduler,
+        "counters": dict(sheets_manager._task_counters),
+        "locks": dict(sheets_manager._worksheet_locks),
+    }
+    sheets_manager._task_counters.clear()
+    sheets_manager._worksheet_locks.clear()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        backend = FakeSheetsBackend()
+        session = sheets_session.SheetsSession(
+            sheet_name="Test Tasks",
+            state_file=os.path.join(state_dir, "sheet_state.json"),
+            client_factory=backend.client,
+        )
+        store = task_store.TaskStore(os.path.join(state_dir, "tasks.sqlite3"))
+        sheets_session.set_session(session)
+        shards.set_shards(
+            shards.ShardDirectory(primary=session, path=os.path.join(state_dir, "shards.json"))
+        )
+        task_store.set_task_store(store)
+        # Quotas are enforced by the fake itself; keep the client-side scheduler out of the way
+        api_scheduler.set_scheduler(
+            api_scheduler.RequestScheduler(
+                reads_per_minute=10**6, writes_per_minute=10**6, burst=10**6
+            )
+        )
+        try:
+            yield backend
+        finally:
+            store.close()
+            sheets_session.set_session(saved["session"])
+            shards.set_shards(saved["shards"])
+            task_store.set_task_store(saved["store"])
+            api_scheduler.set_scheduler(saved["scheduler"])
+            sheets_manager._task_counters.clear()
+            sheets_manager._task_counters.update(saved["counters"])
+            sheets_manager._worksheet_locks.clear()
+            sheets_manager._worksheet_locks.update(saved["locks"])
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from dedupe import Deduplicator, DedupeStore, task_fingerprint
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "dedupe.sqlite3")
+
+
+def _restart(path, capacity=100, window=600):
+    dedupe = Deduplicator(DedupeStore(path), window=window, capacity=capacity)
+    dedupe.load()
+    return dedupe
+
+
+def test_redelivered_message_is_seen_after_a_restart(path):
+    dedupe = _restart(path)
+    assert not dedupe.seen_message(1, 10)
+    dedupe.close()
+
+    dedupe = _restart(path)
+    assert dedupe.seen_message(1, 10)
+    assert not dedupe.seen_message(1, 11)
+    assert not dedupe.seen_message(2, 10)
+    dedupe.close()
+
+
+def test_keys_beyond_the_cache_are_checked_after_a_restart(path):
+    dedupe = _restart(path, capacity=10)
+    for message_id in range(30):
+        assert not dedupe.seen_message(1, message_id)
+    dedupe.close()
+
+    # Only the newest keys fit the cache on load; the rest are looked up in the store
+    dedupe = _restart(path, capacity=10)
+    assert all(dedupe.seen_message(1, message_id) for message_id in range(30))
+    assert dedupe.stats["messages"] == 30
+    dedupe.close()
+
+
+def test_repeated_tasks_are_dropped_within_the_window(path):
+    dedupe = _restart(path)
+    fresh, keys = dedupe.new_tasks(1, ["Call Bob", "call  bob.", "Send memo"])
+    assert fresh == ["Call Bob", "Send memo"]
+    dedupe.close()
+
+    dedupe = _restart(path)
+    fresh, _ = dedupe.new_tasks(1, ["Call Bob", "Book room"])
+    assert fresh == ["Book room"]
+    # Other chats keep their own window
+    assert dedupe.new_tasks(2, ["Call Bob"])[0] == ["Call Bob"]
+    dedupe.close()
+
+
+def test_forgotten_tasks_can_be_sent_again(path):
+    dedupe = _restart(path)
+    _, keys = dedupe.new_tasks(1, ["Call Bob"])
+    dedupe.forget(keys)
+    dedupe.close()
+
+    dedupe = _restart(path)
+    assert dedupe.new_tasks(1, ["Call Bob"])[0] == ["Call Bob"]
+    dedupe.close()
+
+
+def test_expired_keys_are_pruned_on_load(path):
+    store = DedupeStore(path)
+    store.add([("m:1:10", time.time() - 1), ("m:1:11", time.time() + 600)])
+
+    dedupe = Deduplicator(store)
+    dedupe.load()
+    assert [key for key, _ in store.recent(0, 10)] == ["m:1:11"]
+    assert not dedupe.seen_message(1, 10)
+    dedupe.close()
+
+
+def test_fingerprint_ignores_case_spacing_and_punctuation():
+    assert task_fingerprint("Call  Bob!") == task_fingerprint("call bob")
+    assert task_fingerprint("Call Bob") != task_fingerprint("Call Rob")
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("gspread")
+pytest.importorskip("config")
+
+import sheets_manager
+from shards import get_shards
+
+
+def _append(chat_name, chat_id, task):
+    return sheets_manager.append_task_rows(
+        chat_name, chat_id, [sheets_manager.build_task_row(task, "Ann")]
+    )
+
+
+def test_tabs_with_the_same_id_in_different_shards_number_separately(fake_backend):
+    assert _append("Team", 1, "Call Bob") == [1]
+    assert _append("Team", 1, "Send memo") == [2]
+
+    # The next new chat goes to a second shard, where its tab gets the same sheet id
+    get_shards().cell_limit = 1
+    assert _append("Ops", 2, "Patch servers") == [1]
+    team = get_shards().session_for_chat(1, "Team").worksheets.get(1, "Team")[1]
+    ops = get_shards().session_for_chat(2, "Ops").worksheets.get(2, "Ops")[1]
+    assert team.id == ops.id and team.spreadsheet_id != ops.spreadsheet_id
+
+    assert _append("Team", 1, "Book room") == [3]
+    assert _append("Ops", 2, "Rotate keys") == [2]
+
+
+def test_placing_a_chat_keeps_other_chats_cached(fake_backend):
+    _append("Team", 1, "Call Bob")
+    cache = get_shards().session_for_chat(1, "Team").worksheets
+
+    _append("Ops", 2, "Patch servers")
+    misses = cache.stats["misses"]
+    _append("Team", 1, "Send memo")
+    assert cache.stats["misses"] == misses
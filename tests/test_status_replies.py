@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("telegram")
+
+import status_replies
+from status_replies import format_numbers
+
+
+def test_single_numbers_and_ranges():
+    assert format_numbers([20, 12, 13, 14]) == "#12–14, #20"
+    assert format_numbers([5]) == "#5"
+    assert format_numbers([1, 3, 5]) == "#1, #3, #5"
+
+
+def test_missing_numbers_are_left_out():
+    assert format_numbers([None, 4, None, 5]) == "#4–5"
+    assert format_numbers([]) == ""
+
+
+def test_long_lists_collapse_to_their_span(monkeypatch):
+    monkeypatch.setattr(status_replies, "STATUS_MAX_NUMBERS", 3)
+    assert format_numbers([1, 2, 4, 9]) == "#1–9"
+    assert format_numbers([1, 4, 9]) == "#1, #4, #9"
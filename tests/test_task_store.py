@@ -0,0 +1,58 @@
+import pytest
+
+from task_store import TaskStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.sqlite3"))
+    yield store
+    store.close()
+
+
+def _row(number, task, status="Not Started"):
+    return [str(number), "General", task, "", "Ann", "2026-01-09", status, "2026-01-02 09:00:00"]
+
+
+def test_replace_all_matches_a_full_read(store):
+    store.replace_all(
+        {
+            "Team": [_row(1, "Call Bob"), _row(2, "Send memo"), _row(3, "Book room")],
+            "Ops": [_row(1, "Patch servers")],
+        }
+    )
+
+    # Row 2 was deleted by hand, row 3 edited, row 4 added, and the Ops tab removed
+    store.replace_all(
+        {"Team": [_row(1, "Call Bob"), _row(3, "Book room", "Done"), _row(4, "Plan offsite")]}
+    )
+
+    rows = {(r["tab"], r["task_number"]): r for r in store.tasks(limit=100)}
+    assert sorted(rows) == [("Team", 1), ("Team", 3), ("Team", 4)]
+    assert rows[("Team", 3)]["status"] == "Done"
+    assert store.search("memo") == []
+    assert [r["task"] for r in store.search("offsite")] == ["Plan offsite"]
+
+
+def test_replace_all_skips_rows_without_a_task_number(store):
+    store.replace_all({"Team": [_row(1, "Call Bob"), ["", "", "notes"], ["#", "Category"]]})
+    assert store.count() == 1
+
+
+def test_replace_tab_keeps_other_tabs(store):
+    store.replace_all({"Team": [_row(1, "Call Bob")], "Ops": [_row(1, "Patch servers")]})
+    store.replace_tab("Team", [])
+
+    assert [(r["tab"], r["task_number"]) for r in store.tasks(limit=100)] == [("Ops", 1)]
+
+
+def test_unchanged_rows_are_not_rewritten(store):
+    rows = {"Team": [_row(1, "Call Bob"), _row(2, "Send memo")]}
+    store.replace_all(rows)
+    generation = store.generation
+
+    store.replace_all(rows)
+    assert store.generation == generation
+
+    store.upsert("Team", [_row(2, "Send memo", "Done")])
+    assert store.generation > generation
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("gspread")
+pytest.importorskip("config")
+
+import sheets_manager
+from sheets_session import get_session
+from outbox import Outbox
+from write_queue import SheetWriteQueue
+
+CHAT = "Team"
+CHAT_ID = 42
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    yield outbox
+    outbox.close()
+
+
+def _replay(outbox):
+    async def run():
+        queue = SheetWriteQueue(outbox=outbox, flush_window=0, replay_delay=3600)
+        replayed = queue.replay()
+        await queue.stop()
+        return replayed
+
+    return asyncio.run(run())
+
+
+def _sheet_tasks():
+    worksheet = get_session().spreadsheet.worksheet(CHAT)
+    return worksheet.col_values(3)[1:]
+
+
+def test_submit_journals_then_writes(fake_backend, outbox):
+    async def run():
+        queue = SheetWriteQueue(outbox=outbox, flush_window=0)
+        rows = [sheets_manager.build_task_row(t, "Ann") for t in ("Call Bob", "Send memo")]
+        future = queue.submit(CHAT_ID, CHAT, rows)
+        numbers = await future
+        await queue.stop()
+        return numbers
+
+    assert asyncio.run(run()) == [1, 2]
+    assert _sheet_tasks() == ["Call Bob", "Send memo"]
+    assert outbox.pending_count() == 0
+
+
+def test_replay_writes_rows_left_in_the_outbox(fake_backend, outbox):
+    # Journaled before a crash, never written
+    rows = [sheets_manager.build_task_row(t, "Ann") for t in ("Call Bob", "Send memo")]
+    outbox.record(CHAT_ID, CHAT, rows)
+
+    assert _replay(outbox) == 2
+    assert _sheet_tasks() == ["Call Bob", "Send memo"]
+    assert outbox.pending_count() == 0
+    # Nothing left to replay after a second restart
+    assert _replay(outbox) == 0
+
+
+def test_replay_skips_rows_an_ambiguous_write_landed(fake_backend, outbox):
+    landed = sheets_manager.build_task_row("Call Bob", "Ann")
+    lost = sheets_manager.build_task_row("Send memo", "Ann")
+    ids = outbox.record(CHAT_ID, CHAT, [landed, lost])
+    # The append timed out after the first row reached the sheet
+    sheets_manager.append_task_rows(CHAT, CHAT_ID, [list(landed)])
+    outbox.mark_failed(ids, uncertain=True)
+
+    assert _replay(outbox) == 2
+    assert _sheet_tasks() == ["Call Bob", "Send memo"]
+    assert outbox.pending_count() == 0
+
+
+def test_rows_stop_replaying_after_max_attempts(outbox):
+    ids = outbox.record(CHAT_ID, CHAT, [["", "", "Call Bob"]])
+    for _ in range(2):
+        assert outbox.mark_failed(ids, max_attempts=3) == 0
+    assert outbox.mark_failed(ids, max_attempts=3) == 1
+
+    assert outbox.pending(max_attempts=3) == []
+    assert outbox.dead_count(max_attempts=3) == 1
+    assert outbox.pending_count() == 1
@@ -0,0 +1,73 @@
+import os
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# Updates handled at the same time across all chats
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "32"))
+
+# Updates accepted at once, including those waiting for their chat's turn
+MAX_QUEUED_UPDATES = int(os.getenv("MAX_QUEUED_UPDATES", "256"))
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently across chats but one at a time within a chat
+
+    Messages from the same chat are handled in arrival order, so the tasks of
+    one group reach its worksheet in the order they were sent, while a slow
+    write for one group no longer holds up every other group.
+
+    PTB's own semaphore bounds the updates accepted (MAX_QUEUED_UPDATES). An
+    update then waits for its chat's turn before taking one of the
+    MAX_CONCURRENT_UPDATES running slots, so a busy chat queues behind itself
+    instead of starving the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates=MAX_CONCURRENT_UPDATES,
+        max_queued_updates=MAX_QUEUED_UPDATES,
+    ):
+        super().__init__(max(max_queued_updates, max_concurrent_updates))
+        self._running = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._lanes = {}  # chat id -> [lock, updates holding or waiting for it]
+
+    @property
+    def active_chats(self):
+        """Number of chats with an update being processed or waiting"""
+        return len(self._lanes)
+
+    async def do_process_update(self, update, coroutine):
+        chat_key = _chat_key(update)
+        if chat_key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        lane = self._lanes.get(chat_key)
+        if lane is None:
+            lane = self._lanes[chat_key] = [asyncio.Lock(), 0]
+        lane[1] += 1
+        try:
+            async with lane[0], self._running:
+                await coroutine
+        finally:
+            lane[1] -= 1
+            if lane[1] == 0:
+                del self._lanes[chat_key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+
+def _chat_key(update):
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return ("user", update.effective_user.id)
+    return None
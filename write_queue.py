@@ -0,0 +1,232 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sheets_manager import append_task_rows, find_written_rows, AmbiguousWriteError
+from outbox import OUTBOX_MAX_ATTEMPTS
+import metrics
+
+# How long to let a burst of tasks for one chat accumulate before writing
+WRITE_FLUSH_WINDOW = float(os.getenv("WRITE_FLUSH_WINDOW", "0.25"))
+
+# Upper bound on concurrent Google Sheets writes (one chat per thread)
+MAX_WRITE_WORKERS = int(os.getenv("MAX_WRITE_WORKERS", "4"))
+
+# Seconds to wait before replaying the outbox after a failed write
+OUTBOX_REPLAY_DELAY = float(os.getenv("OUTBOX_REPLAY_DELAY", "30"))
+
+# Rows read from the outbox per replay batch
+OUTBOX_REPLAY_BATCH = 500
+
+
+class SheetWriteQueue:
+    """Write-behind queue that batches task rows per chat off the event loop"""
+
+    def __init__(
+        self,
+        outbox=None,
+        flush_window=WRITE_FLUSH_WINDOW,
+        max_workers=MAX_WRITE_WORKERS,
+        replay_delay=OUTBOX_REPLAY_DELAY,
+        on_written=None,
+    ):
+        self.outbox = outbox
+        # Called as on_written(chat_id, chat_name, rows) after rows reach the sheet
+        self.on_written = on_written
+        self.flush_window = flush_window
+        self.replay_delay = replay_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sheets-writer"
+        )
+        # chat key -> [(chat_name, rows, outbox ids, future, check first), ...]
+        self._pending = {}
+        self._lanes = {}  # chat key -> drain task
+        self._queued_ids = set()  # outbox ids queued or being written
+        self._replay_task = None
+        self._closed = False
+        self.stats = {
+            "submitted": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "failures": 0,
+            "replayed": 0,
+        }
+
+    @property
+    def depth(self):
+        """Number of task rows waiting to be written"""
+        return sum(
+            len(item[1]) for batch in self._pending.values() for item in batch
+        )
+
+    @property
+    def in_flight(self):
+        """Number of chats with a write in progress or scheduled"""
+        return len(self._lanes)
+
+    def submit(self, chat_id, chat_name, rows):
+        """Journal task rows and queue them; the future resolves to their task numbers
+
+        Handlers should attach callbacks to the future rather than await it,
+        so a chat's updates aren't held up behind its Sheets writes.
+        """
+        if self._closed:
+            raise RuntimeError("Write queue is shut down")
+
+        # Commit locally first so a failed or interrupted write can be replayed
+        outbox_ids = self.outbox.record(chat_id, chat_name, rows) if self.outbox else []
+        return self._enqueue(chat_id, chat_name, rows, outbox_ids)
+
+    def _enqueue(self, chat_id, chat_name, rows, outbox_ids, verify=False):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        chat_key = chat_id if chat_id is not None else chat_name
+
+        self._pending.setdefault(chat_key, []).append(
+            (chat_name, rows, outbox_ids, future, verify)
+        )
+        self._queued_ids.update(outbox_ids)
+        self.stats["submitted"] += len(rows)
+
+        # One drain task per chat keeps appends to a worksheet in order
+        if chat_key not in self._lanes:
+            self._lanes[chat_key] = loop.create_task(self._drain(chat_key, chat_id))
+
+        return future
+
+    async def _drain(self, chat_key, chat_id):
+        try:
+            while self._pending.get(chat_key):
+                # Let the rest of a burst arrive so it goes out in one request
+                await asyncio.sleep(self.flush_window)
+                batch = self._pending.pop(chat_key)
+                await self._flush(chat_id, batch)
+        finally:
+            self._lanes.pop(chat_key, None)
+
+    async def _flush(self, chat_id, batch):
+        chat_name = batch[-1][0]
+        rows = [row for item in batch for row in item[1]]
+        outbox_ids = [row_id for item in batch for row_id in item[2]]
+        verify = any(item[4] for item in batch)
+        loop = asyncio.get_running_loop()
+
+        try:
+            numbers = await loop.run_in_executor(
+                self._executor, _append, chat_name, chat_id, rows, verify
+            )
+        except Exception as e:
+            self.stats["failures"] += 1
+            metrics.inc("tasks_write_failures_total", len(rows))
+            print(f"❌ Failed to write {len(rows)} task(s) for {chat_name}: {e}")
+            if self.outbox and outbox_ids:
+                # Timeouts and 5xx may have landed; the replay checks the sheet first
+                dead = self.outbox.mark_failed(
+                    outbox_ids, uncertain=isinstance(e, AmbiguousWriteError)
+                )
+                if dead:
+                    print(
+                        f"❌ Giving up on {dead} task(s) after {OUTBOX_MAX_ATTEMPTS} "
+                        "attempts; they stay in the outbox"
+                    )
+                self._schedule_replay()
+            self._queued_ids.difference_update(outbox_ids)
+            for item in batch:
+                if not item[3].done():
+                    item[3].set_exception(e)
+            return
+
+        if self.outbox and outbox_ids:
+            self.outbox.mark_synced(outbox_ids, numbers)
+        self._queued_ids.difference_update(outbox_ids)
+        self.stats["flushes"] += 1
+        self.stats["rows_written"] += len(rows)
+        metrics.inc("tasks_written_total", len(rows))
+        print(f"✅ Wrote {len(rows)} task(s) to Google Sheet ({chat_name})")
+
+        if self.on_written is not None:
+            try:
+                self.on_written(chat_id, chat_name, rows)
+            except Exception as e:
+                print(f"❌ Post-write hook failed for {chat_name}: {e}")
+
+        # Hand each submitter the numbers of its own rows
+        offset = 0
+        for _, item_rows, _, future, _ in batch:
+            if not future.done():
+                future.set_result(numbers[offset : offset + len(item_rows)])
+            offset += len(item_rows)
+
+    def replay(self):
+        """Queue every unsynced outbox row that isn't already being written"""
+        if not self.outbox or self._closed:
+            return 0
+
+        replayed = 0
+        last_id = 0
+        while True:
+            entries = self.outbox.pending(limit=OUTBOX_REPLAY_BATCH, after_id=last_id)
+            if not entries:
+                break
+            last_id = entries[-1][0]
+
+            # Group the batch per chat so each chat replays as one append
+            groups = {}
+            for row_id, chat_id, chat_name, row, uncertain in entries:
+                if row_id in self._queued_ids:
+                    continue
+                key = chat_id if chat_id is not None else chat_name
+                group = groups.setdefault(key, [chat_id, chat_name, [], [], False])
+                group[2].append(row)
+                group[3].append(row_id)
+                group[4] = group[4] or uncertain
+
+            for chat_id, chat_name, rows, row_ids, verify in groups.values():
+                future = self._enqueue(chat_id, chat_name, rows, row_ids, verify)
+                # Nobody awaits replayed writes; failures reschedule a replay
+                future.add_done_callback(_ignore_result)
+                replayed += len(rows)
+
+        if replayed:
+            self.stats["replayed"] += replayed
+            print(f"🔁 Replaying {replayed} unsynced task(s) from the outbox")
+        return replayed
+
+    def _schedule_replay(self):
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.get_running_loop().create_task(
+                self._replay_later()
+            )
+
+    async def _replay_later(self):
+        await asyncio.sleep(self.replay_delay)
+        self.replay()
+
+    async def stop(self):
+        """Stop accepting tasks and wait for queued writes to finish"""
+        self._closed = True
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+        while self._lanes:
+            await asyncio.gather(*list(self._lanes.values()), return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+
+def _append(chat_name, chat_id, rows, verify=False):
+    """Append rows, skipping those an earlier ambiguous attempt already wrote"""
+    if not verify:
+        return append_task_rows(chat_name, chat_id, rows)
+
+    numbers = find_written_rows(chat_name, chat_id, rows)
+    for row, number in zip(rows, numbers):
+        if number is not None:
+            row[0] = number
+    missing = [row for row, number in zip(rows, numbers) if number is None]
+    if missing:
+        written = iter(append_task_rows(chat_name, chat_id, missing))
+        numbers = [next(written) if number is None else number for number in numbers]
+    return numbers
+
+
+def _ignore_result(future):
+    if not future.cancelled():
+        future.exception()